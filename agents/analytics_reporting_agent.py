@@ -2,17 +2,92 @@
 Analytics & Reporting Agent
 Aggregates metrics from all agents and generates insights
 """
-import json
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+import math
+import statistics
+import threading
+from collections import Counter, deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Union
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Per-message engagement flags tracked for campaign results
+_CAMPAIGN_FLAGS = ("opened", "clicked", "replied")
+_CAMPAIGN_DTYPE = np.dtype([(flag, np.bool_) for flag in _CAMPAIGN_FLAGS])
+
+# Numeric metrics tracked across history entries for anomalies and forecasts
+_NUMERIC_METRICS = (
+    "total_agents_active",
+    "overall_success_rate",
+    "prospects",
+    "conversion",
+    "messages_sent",
+    "replies_received",
+    "meetings_booked",
+)
+
+
+def _results_to_soa(results: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convert a list of result dicts into one boolean array per engagement flag."""
+    rows = np.fromiter(
+        (tuple(bool(r.get(flag, False)) for flag in _CAMPAIGN_FLAGS) for r in results),
+        dtype=_CAMPAIGN_DTYPE,
+        count=len(results)
+    )
+    return {flag: rows[flag] for flag in _CAMPAIGN_FLAGS}
+
+# Static recommendation messages
+_REC_LOW_CONVERSION = "⚠️ Conversion rate below 3% - consider refining ICP criteria or improving messaging"
+_REC_LOW_PIPELINE = "📉 Pipeline value below $10K - increase prospecting volume"
+_REC_LOW_OPEN_RATE = "📧 Email open rate below 20% - A/B test subject lines"
+_REC_LOW_REPLY_RATE = "💬 Reply rate below 5% - personalize message openers"
+_REC_HEALTHY = "✅ All metrics within healthy ranges - maintain current strategy"
+
+
+class _RollingStats:
+    """Mean/stdev of a metric over the last N history entries.
+    
+    The window is a handful of entries, so both are computed exactly from the
+    live samples on each read rather than maintained incrementally.
+    """
+    
+    def __init__(self, window: int):
+        self.window = window
+        self.samples: deque = deque(maxlen=window)  # None marks entries without a numeric value
+    
+    def push(self, value: Optional[float]):
+        """Add the newest sample, evicting the oldest once the window is full."""
+        self.samples.append(value)
+    
+    @property
+    def values(self) -> List[float]:
+        return [v for v in self.samples if v is not None]
+    
+    @property
+    def n(self) -> int:
+        return len(self.values)
+    
+    @property
+    def mean(self) -> float:
+        values = self.values
+        return statistics.fmean(values) if values else 0.0
+    
+    @property
+    def stdev(self) -> float:
+        """Sample standard deviation of the current window."""
+        values = self.values
+        return statistics.stdev(values) if len(values) >= 2 else 0.0
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentMetrics:
     """Metrics for a single agent."""
     agent_name: str
@@ -23,7 +98,7 @@ class AgentMetrics:
     last_run: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PipelineMetrics:
     """Sales pipeline metrics."""
     total_prospects: int
@@ -37,7 +112,7 @@ class PipelineMetrics:
     conversion_rate: float
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CampaignMetrics:
     """Outreach campaign metrics."""
     messages_sent: int
@@ -52,6 +127,21 @@ class CampaignMetrics:
     reply_rate: float
 
 
+# Shared default for reports without an email campaign (frozen, so safe to share)
+_EMPTY_CAMPAIGN = CampaignMetrics(
+    messages_sent=0,
+    messages_delivered=0,
+    opened=0,
+    clicked=0,
+    replied=0,
+    meetings_booked=0,
+    unsubscribed=0,
+    open_rate=0,
+    click_rate=0,
+    reply_rate=0
+)
+
+
 class AnalyticsReportingAgent:
     """
     Agent for collecting, analyzing, and reporting on all system metrics.
@@ -64,37 +154,124 @@ class AnalyticsReportingAgent:
     - Anomaly detection
     """
     
+    ANOMALY_WINDOW = 7  # history entries used as the anomaly baseline
+    FORECAST_WINDOW = 14  # history entries used for trend forecasts
+    HISTORY_MAXLEN = 90  # entries kept in memory; the full log stays on disk
+    
     def __init__(self, data_dir: str = "data/metrics"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.history_file = self.data_dir / "metrics_history.jsonl"
         
-        self.metrics_history: List[Dict] = []
+        self.metrics_history: Deque[Dict] = deque(maxlen=self.HISTORY_MAXLEN)
         self.current_metrics: Dict = {}
         
+        # Rolling per-metric stats over the anomaly detection window
+        self._window_stats: Dict[str, _RollingStats] = {
+            name: _RollingStats(self.ANOMALY_WINDOW) for name in _NUMERIC_METRICS
+        }
+        # One float column per numeric metric (NaN where an entry lacks it)
+        self._numeric_history: Dict[str, deque] = {
+            name: deque(maxlen=self.FORECAST_WINDOW) for name in _NUMERIC_METRICS
+        }
+        
+        # Encoded history lines waiting for the writer
+        self._pending_history: List[bytes] = []
+        self._history_lock = threading.Lock()
+        self._history_writer_busy = False
+        
         self._load_historical_data()
+        recent_start = max(0, len(self.metrics_history) - self.FORECAST_WINDOW)
+        for entry in islice(self.metrics_history, recent_start, None):
+            self._track_history_entry(entry)
     
     def _load_historical_data(self):
         """Load historical metrics from disk."""
-        history_file = self.data_dir / "metrics_history.json"
+        history_file = self.history_file
         if history_file.exists():
-            with open(history_file) as f:
-                self.metrics_history = json.load(f)
+            with open(history_file, 'rb') as f:
+                self.metrics_history.extend(orjson.loads(line) for line in f if line.strip())
+            return
+        
+        # Migrate the legacy single-document history to the append-only log
+        legacy_file = self.data_dir / "metrics_history.json"
+        if legacy_file.exists():
+            with open(legacy_file, 'rb') as f:
+                legacy_history = orjson.loads(f.read())
+            with open(history_file, 'wb') as f:
+                for entry in legacy_history:
+                    f.write(orjson.dumps(entry, default=str) + b"\n")
+            self.metrics_history.extend(legacy_history)
+    
+    def _save_historical_data(self, entry: Dict):
+        """
+        Append a single metrics entry to the on-disk history log.
+        
+        Inside a running event loop the write is handed to the default
+        executor. Lines queued while a write is in flight are coalesced
+        into the writer's next append.
+        """
+        line = orjson.dumps(entry, default=str) + b"\n"
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        with self._history_lock:
+            self._pending_history.append(line)
+            if self._history_writer_busy:
+                return
+            self._history_writer_busy = True
+        
+        if loop is not None:
+            future = loop.run_in_executor(None, self._drain_pending_history)
+            future.add_done_callback(self._log_history_write_error)
+        else:
+            self._drain_pending_history()
+    
+    def _drain_pending_history(self):
+        """Write pending history lines until none are left."""
+        while True:
+            with self._history_lock:
+                if not self._pending_history:
+                    self._history_writer_busy = False
+                    return
+                batch, self._pending_history = self._pending_history, []
+            try:
+                with open(self.history_file, 'ab') as f:
+                    f.write(b"".join(batch))
+            except OSError:
+                with self._history_lock:
+                    self._history_writer_busy = False
+                raise
     
-    def _save_historical_data(self):
-        """Save metrics history to disk."""
-        history_file = self.data_dir / "metrics_history.json"
-        with open(history_file, 'w') as f:
-            json.dump(self.metrics_history, f, indent=2, default=str)
+    def _log_history_write_error(self, future: asyncio.Future):
+        """Surface a failed background history write, which nobody awaits."""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error writing history to {self.history_file}: {future.exception()}")
+    
+    def _track_history_entry(self, entry: Dict):
+        """Feed a history entry into the numeric columns and rolling stats."""
+        for metric_name in _NUMERIC_METRICS:
+            value = entry.get(metric_name)
+            value = float(value) if isinstance(value, (int, float)) else None
+            self._window_stats[metric_name].push(value)
+            self._numeric_history[metric_name].append(math.nan if value is None else value)
     
     def collect_agent_metrics(self, agent_results: Dict[str, any]) -> List[AgentMetrics]:
         """Collect metrics from all agent executions."""
         metrics = []
+        now = datetime.now()
         
         for agent_name, results in agent_results.items():
             if isinstance(results, list):
-                completed = len([r for r in results if r.get('success', False)])
-                failed = len(results) - completed
-                success_rate = (completed / len(results) * 100) if results else 0
+                total = completed = 0
+                for r in results:
+                    total += 1
+                    if r.get('success', False):
+                        completed += 1
+                failed = total - completed
+                success_rate = (completed / total * 100) if total else 0
             else:
                 completed = 1 if results else 0
                 failed = 0 if results else 1
@@ -106,7 +283,7 @@ class AnalyticsReportingAgent:
                 tasks_failed=failed,
                 avg_execution_time_ms=0.0,  # Would be calculated from timestamps
                 success_rate=success_rate,
-                last_run=datetime.now()
+                last_run=now
             )
             metrics.append(metric)
         
@@ -117,55 +294,53 @@ class AnalyticsReportingAgent:
                                pipeline_stages: Dict) -> PipelineMetrics:
         """Analyze the health of the sales pipeline."""
         
-        # Count prospects by stage
-        stages = {
-            "new": [],
-            "qualified": [],
-            "opportunity": [],
-            "closed_won": [],
-            "closed_lost": []
-        }
-        
+        # Count prospects by stage, summing opportunity value in the same pass
+        counts = Counter()
+        pipeline_value = 0
         for prospect in current_prospects:
             stage = prospect.get("stage", "new").lower()
-            if stage in stages:
-                stages[stage].append(prospect)
+            counts[stage] += 1
+            if stage == "opportunity":
+                pipeline_value += prospect.get("estimated_value", 0)
         
         # Calculate metrics
         total = len(current_prospects)
-        closed_won = len(stages["closed_won"])
-        
-        pipeline_value = sum(
-            p.get("estimated_value", 0) 
-            for p in stages["opportunity"]
-        )
+        closed_won = counts["closed_won"]
+        opportunities = counts["opportunity"]
         
-        avg_deal = pipeline_value / len(stages["opportunity"]) if stages["opportunity"] else 0
+        avg_deal = pipeline_value / opportunities if opportunities else 0
         
         conversion = (closed_won / total * 100) if total > 0 else 0
         
         return PipelineMetrics(
             total_prospects=total,
-            new_leads=len(stages["new"]),
-            qualified_leads=len(stages["qualified"]),
-            opportunities=len(stages["opportunity"]),
+            new_leads=counts["new"],
+            qualified_leads=counts["qualified"],
+            opportunities=opportunities,
             closed_won=closed_won,
-            closed_lost=len(stages["closed_lost"]),
+            closed_lost=counts["closed_lost"],
             pipeline_value=pipeline_value,
             avg_deal_size=avg_deal,
             conversion_rate=conversion
         )
     
     def analyze_campaign_performance(self, 
-                                    email_results: List[Dict],
-                                    linkedin_results: List[Dict]) -> Dict[str, CampaignMetrics]:
-        """Analyze outreach campaign performance."""
+                                    email_results: Union[List[Dict], Dict[str, np.ndarray]],
+                                    linkedin_results: Union[List[Dict], Dict[str, np.ndarray]]) -> Dict[str, CampaignMetrics]:
+        """
+        Analyze outreach campaign performance.
+        
+        Results may be passed either as a list of per-message dicts or already
+        column-oriented (flag name -> boolean array), which skips the conversion.
+        """
+        email = email_results if isinstance(email_results, dict) else _results_to_soa(email_results)
+        linkedin = linkedin_results if isinstance(linkedin_results, dict) else _results_to_soa(linkedin_results)
         
         # Email metrics
-        email_sent = len(email_results)
-        email_opened = sum(1 for r in email_results if r.get('opened', False))
-        email_clicked = sum(1 for r in email_results if r.get('clicked', False))
-        email_replied = sum(1 for r in email_results if r.get('replied', False))
+        email_sent = len(email["opened"])
+        email_opened = int(email["opened"].sum())
+        email_clicked = int(email["clicked"].sum())
+        email_replied = int(email["replied"].sum())
         
         email_metrics = CampaignMetrics(
             messages_sent=email_sent,
@@ -181,8 +356,8 @@ class AnalyticsReportingAgent:
         )
         
         # LinkedIn metrics
-        linkedin_sent = len(linkedin_results)
-        linkedin_replied = sum(1 for r in linkedin_results if r.get('replied', False))
+        linkedin_sent = len(linkedin["replied"])
+        linkedin_replied = int(linkedin["replied"].sum())
         
         linkedin_metrics = CampaignMetrics(
             messages_sent=linkedin_sent,
@@ -207,28 +382,19 @@ class AnalyticsReportingAgent:
         """Detect anomalies in current metrics vs historical data."""
         anomalies = []
         
-        if len(self.metrics_history) < 7:
+        if len(self.metrics_history) < self.ANOMALY_WINDOW:
             return anomalies  # Need at least a week of data
         
-        # Calculate historical averages
-        historical = self.metrics_history[-7:]  # Last 7 data points
-        
         for metric_name, current_value in metrics.items():
             if not isinstance(current_value, (int, float)):
                 continue
             
-            historical_values = [
-                h.get(metric_name, 0) 
-                for h in historical 
-                if isinstance(h.get(metric_name), (int, float))
-            ]
-            
-            if len(historical_values) < 3:
+            stats = self._window_stats.get(metric_name)
+            if stats is None or stats.n < 3:
                 continue
             
-            import statistics
-            avg = statistics.mean(historical_values)
-            std = statistics.stdev(historical_values) if len(historical_values) > 1 else 0
+            avg = stats.mean
+            std = stats.stdev
             
             # Check if current value is an outlier
             if std > 0 and abs(current_value - avg) > (threshold_std * std):
@@ -246,7 +412,7 @@ class AnalyticsReportingAgent:
     
     def forecast_trends(self, days_ahead: int = 7) -> Dict:
         """Forecast future performance based on historical trends."""
-        if len(self.metrics_history) < 14:
+        if len(self.metrics_history) < self.FORECAST_WINDOW:
             return {"error": "Insufficient data for forecasting (need 14+ days)"}
         
         # Simple linear trend for key metrics
@@ -255,16 +421,13 @@ class AnalyticsReportingAgent:
         key_metrics = ["messages_sent", "replies_received", "meetings_booked"]
         
         for metric in key_metrics:
-            values = [
-                h.get(metric, 0) 
-                for h in self.metrics_history[-14:]
-                if isinstance(h.get(metric), (int, float))
-            ]
+            values = np.array(self._numeric_history[metric])
+            values = values[~np.isnan(values)]
             
             if len(values) >= 7:
                 # Calculate trend (simple moving average slope)
-                first_week = sum(values[:7]) / 7
-                second_week = sum(values[7:14]) / 7
+                first_week = float(values[:7].sum()) / 7
+                second_week = float(values[7:14].sum()) / 7
                 weekly_trend = second_week - first_week
                 
                 # Project forward
@@ -282,23 +445,24 @@ class AnalyticsReportingAgent:
                             pipeline: PipelineMetrics,
                             campaigns: Dict[str, CampaignMetrics]) -> Dict:
         """Generate comprehensive daily report."""
+        now_iso = datetime.now().isoformat()
         
         report = {
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": now_iso,
             "period": "daily",
             "executive_summary": {
                 "total_agents_active": len(agent_metrics),
                 "overall_success_rate": sum(m.success_rate for m in agent_metrics) / len(agent_metrics) if agent_metrics else 0,
                 "pipeline_health": "healthy" if pipeline.conversion_rate > 5 else "needs_attention",
-                "campaign_performance": "strong" if campaigns.get("email", CampaignMetrics(0,0,0,0,0,0,0,0,0,0,0)).reply_rate > 10 else "average"
+                "campaign_performance": "strong" if campaigns.get("email", _EMPTY_CAMPAIGN).reply_rate > 10 else "average"
             },
-            "agent_performance": [asdict(m) for m in agent_metrics],
-            "pipeline": asdict(pipeline),
-            "campaigns": {k: asdict(v) for k, v in campaigns.items()},
+            "agent_performance": agent_metrics,
+            "pipeline": pipeline,
+            "campaigns": campaigns,
             "anomalies": self.detect_anomalies({
                 "prospects": pipeline.total_prospects,
                 "conversion": pipeline.conversion_rate,
-                "messages_sent": campaigns.get("email", CampaignMetrics(0,0,0,0,0,0,0,0,0,0,0)).messages_sent
+                "messages_sent": campaigns.get("email", _EMPTY_CAMPAIGN).messages_sent
             }),
             "recommendations": self._generate_recommendations(
                 agent_metrics, pipeline, campaigns
@@ -306,11 +470,13 @@ class AnalyticsReportingAgent:
         }
         
         # Store for historical tracking
-        self.metrics_history.append({
-            "timestamp": datetime.now().isoformat(),
+        entry = {
+            "timestamp": now_iso,
             **report["executive_summary"]
-        })
-        self._save_historical_data()
+        }
+        self.metrics_history.append(entry)
+        self._track_history_entry(entry)
+        self._save_historical_data(entry)
         
         return report
     
@@ -322,26 +488,18 @@ class AnalyticsReportingAgent:
         
         # Pipeline recommendations
         if pipeline.conversion_rate < 3:
-            recommendations.append(
-                "⚠️ Conversion rate below 3% - consider refining ICP criteria or improving messaging"
-            )
+            recommendations.append(_REC_LOW_CONVERSION)
         
         if pipeline.pipeline_value < 10000:
-            recommendations.append(
-                "📉 Pipeline value below $10K - increase prospecting volume"
-            )
+            recommendations.append(_REC_LOW_PIPELINE)
         
         # Campaign recommendations
-        email = campaigns.get("email", CampaignMetrics(0,0,0,0,0,0,0,0,0,0,0))
+        email = campaigns.get("email", _EMPTY_CAMPAIGN)
         if email.open_rate < 20:
-            recommendations.append(
-                "📧 Email open rate below 20% - A/B test subject lines"
-            )
+            recommendations.append(_REC_LOW_OPEN_RATE)
         
         if email.reply_rate < 5:
-            recommendations.append(
-                "💬 Reply rate below 5% - personalize message openers"
-            )
+            recommendations.append(_REC_LOW_REPLY_RATE)
         
         # Agent recommendations
         for metric in agent_metrics:
@@ -351,7 +509,7 @@ class AnalyticsReportingAgent:
                 )
         
         if not recommendations:
-            recommendations.append("✅ All metrics within healthy ranges - maintain current strategy")
+            recommendations.append(_REC_HEALTHY)
         
         return recommendations
     
@@ -361,8 +519,12 @@ class AnalyticsReportingAgent:
         
         if format == "json":
             filepath = self.data_dir / f"report_{timestamp}.json"
-            with open(filepath, 'w') as f:
-                json.dump(report, f, indent=2, default=str)
+            # orjson serializes dataclasses and datetimes natively
+            filepath.write_bytes(orjson.dumps(
+                report,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS,
+                default=str
+            ))
             return str(filepath)
         
         elif format == "markdown":
@@ -374,6 +536,10 @@ class AnalyticsReportingAgent:
         
         return ""
     
+    async def aexport_report(self, report: Dict, format: str = "json") -> str:
+        """Export a report without blocking the event loop."""
+        return await asyncio.to_thread(self.export_report, report, format)
+    
     def _generate_markdown_report(self, report: Dict) -> str:
         """Generate human-readable markdown report."""
         lines = [
@@ -3,16 +3,19 @@ Competitor Intelligence Agent
 Monitors competitor activities, pricing, and market positioning
 """
 import os
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import json
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CompetitorInsight:
     """Represents a competitor insight."""
     competitor_name: str
@@ -22,6 +25,13 @@ class CompetitorInsight:
     date_detected: datetime
     confidence_score: float  # 0-1
     recommended_action: Optional[str] = None
+    description_lower: str = field(init=False, repr=False, compare=False)
+    ts: float = field(init=False, repr=False, compare=False)  # date_detected as epoch seconds
+    
+    def __post_init__(self):
+        # Lowercased once here so trend matching doesn't redo it per report
+        object.__setattr__(self, "description_lower", self.description.lower())
+        object.__setattr__(self, "ts", self.date_detected.timestamp())
 
 
 class CompetitorIntelligenceAgent:
@@ -40,7 +50,11 @@ class CompetitorIntelligenceAgent:
         self.config = config or {}
         self.competitors = self.config.get("competitors", [])
         self.tracking_keywords = self.config.get("keywords", [])
+        # Kept sorted by date_detected, parallel to the _insight_ts timestamps
         self.insights_history: List[CompetitorInsight] = []
+        self._insight_ts: List[float] = []
+        # Per-competitor (timestamps, insights) lists, also sorted by date
+        self._by_competitor: Dict[str, Tuple[List[float], List[CompetitorInsight]]] = {}
         
         # Data sources
         self.sources = {
@@ -64,15 +78,16 @@ class CompetitorIntelligenceAgent:
             "last_checked": None
         }
         self.competitors.append(competitor)
-        logger.info(f"Added competitor: {name}")
+        logger.info("Added competitor: %s", name)
         return True
     
-    def monitor_pricing_changes(self, competitor: Dict) -> Optional[CompetitorInsight]:
+    async def monitor_pricing_changes(self, competitor: Dict, now: Optional[datetime] = None) -> Optional[CompetitorInsight]:
         """Monitor competitor pricing page for changes."""
+        now = now or datetime.now()
         # This would scrape pricing pages or use APIs
         # Simulation for now
         
-        logger.info(f"Checking pricing for {competitor['name']}")
+        logger.debug("Checking pricing for %s", competitor["name"])
         
         # Simulate price change detection
         if competitor.get("baseline_pricing"):
@@ -84,13 +99,14 @@ class CompetitorIntelligenceAgent:
                 "starter": 29,
                 "professional": 99,
                 "enterprise": 299,
-                "captured_at": datetime.now().isoformat()
+                "captured_at": now.isoformat()
             }
         
         return None  # No change detected in simulation
     
-    def monitor_job_postings(self, competitor: Dict) -> List[CompetitorInsight]:
+    async def monitor_job_postings(self, competitor: Dict, now: Optional[datetime] = None) -> List[CompetitorInsight]:
         """Analyze job postings for strategic signals."""
+        now = now or datetime.now()
         insights = []
         
         # Key roles that indicate strategy shifts
@@ -100,7 +116,7 @@ class CompetitorIntelligenceAgent:
             "customer success", "account executive"
         ]
         
-        logger.info(f"Checking job postings for {competitor['name']}")
+        logger.debug("Checking job postings for %s", competitor["name"])
         
         # Simulation: Detect strategic hiring
         if "salesforce" in competitor["name"].lower():
@@ -109,7 +125,7 @@ class CompetitorIntelligenceAgent:
                 insight_type="hiring",
                 description="Hiring 5 Enterprise Account Executives - likely targeting mid-market expansion",
                 source="LinkedIn Jobs",
-                date_detected=datetime.now(),
+                date_detected=now,
                 confidence_score=0.85,
                 recommended_action="Review your enterprise positioning and prepare competitive responses"
             )
@@ -117,11 +133,12 @@ class CompetitorIntelligenceAgent:
         
         return insights
     
-    def monitor_social_positioning(self, competitor: Dict) -> List[CompetitorInsight]:
+    async def monitor_social_positioning(self, competitor: Dict, now: Optional[datetime] = None) -> List[CompetitorInsight]:
         """Monitor social media for positioning changes."""
+        now = now or datetime.now()
         insights = []
         
-        logger.info(f"Checking social positioning for {competitor['name']}")
+        logger.debug("Checking social positioning for %s", competitor["name"])
         
         # Simulation: Detect messaging shift
         if competitor["name"] == "HubSpot":
@@ -130,7 +147,7 @@ class CompetitorIntelligenceAgent:
                 insight_type="positioning",
                 description="Shifted messaging from 'inbound marketing' to 'customer platform' - expanding beyond marketing",
                 source="LinkedIn/Twitter",
-                date_detected=datetime.now(),
+                date_detected=now,
                 confidence_score=0.90,
                 recommended_action="Highlight your specialized focus vs their broad approach"
             )
@@ -138,11 +155,12 @@ class CompetitorIntelligenceAgent:
         
         return insights
     
-    def analyze_feature_releases(self, competitor: Dict) -> List[CompetitorInsight]:
+    async def analyze_feature_releases(self, competitor: Dict, now: Optional[datetime] = None) -> List[CompetitorInsight]:
         """Monitor for new feature announcements."""
+        now = now or datetime.now()
         insights = []
         
-        logger.info(f"Checking feature releases for {competitor['name']}")
+        logger.debug("Checking feature releases for %s", competitor["name"])
         
         # Simulation: Detect AI feature launch
         if "ai" in competitor["name"].lower() or "openai" in competitor["name"].lower():
@@ -151,7 +169,7 @@ class CompetitorIntelligenceAgent:
                 insight_type="feature",
                 description="Launched AI-powered content generation feature - directly competes with your offering",
                 source="Product Blog",
-                date_detected=datetime.now(),
+                date_detected=now,
                 confidence_score=0.95,
                 recommended_action="Accelerate your AI roadmap and emphasize your unique data advantages"
             )
@@ -159,9 +177,10 @@ class CompetitorIntelligenceAgent:
         
         return insights
     
-    def check_funding_news(self, competitor: Dict) -> Optional[CompetitorInsight]:
+    async def check_funding_news(self, competitor: Dict, now: Optional[datetime] = None) -> Optional[CompetitorInsight]:
         """Monitor for funding and acquisition news."""
-        logger.info(f"Checking funding news for {competitor['name']}")
+        now = now or datetime.now()
+        logger.debug("Checking funding news for %s", competitor["name"])
         
         # Simulation: Detect funding
         if competitor["name"] == "Notion":
@@ -170,100 +189,124 @@ class CompetitorIntelligenceAgent:
                 insight_type="funding",
                 description="Raised $50M Series C at $2B valuation - significant war chest for expansion",
                 source="TechCrunch",
-                date_detected=datetime.now(),
+                date_detected=now,
                 confidence_score=0.98,
                 recommended_action="Expect aggressive hiring and pricing - focus on your niche expertise"
             )
         
         return None
     
-    def run_full_competitor_scan(self) -> Dict:
-        """Run comprehensive scan on all competitors."""
-        all_insights = []
+    async def _scan_competitor(self, competitor: Dict, now: datetime,
+                               now_iso: str) -> List[CompetitorInsight]:
+        """Run all monitoring functions for one competitor concurrently."""
+        logger.info("Scanning competitor: %s", competitor["name"])
         
-        for competitor in self.competitors:
-            logger.info(f"Scanning competitor: {competitor['name']}")
-            
-            # Run all monitoring functions
-            pricing = self.monitor_pricing_changes(competitor)
-            if pricing:
-                all_insights.append(pricing)
-            
-            jobs = self.monitor_job_postings(competitor)
-            all_insights.extend(jobs)
-            
-            social = self.monitor_social_positioning(competitor)
-            all_insights.extend(social)
-            
-            features = self.analyze_feature_releases(competitor)
-            all_insights.extend(features)
-            
-            funding = self.check_funding_news(competitor)
-            if funding:
-                all_insights.append(funding)
-            
-            competitor["last_checked"] = datetime.now().isoformat()
+        pricing, jobs, social, features, funding = await asyncio.gather(
+            self.monitor_pricing_changes(competitor, now),
+            self.monitor_job_postings(competitor, now),
+            self.monitor_social_positioning(competitor, now),
+            self.analyze_feature_releases(competitor, now),
+            self.check_funding_news(competitor, now)
+        )
+        
+        insights = []
+        if pricing:
+            insights.append(pricing)
+        insights.extend(jobs)
+        insights.extend(social)
+        insights.extend(features)
+        if funding:
+            insights.append(funding)
+        
+        competitor["last_checked"] = now_iso
+        return insights
+    
+    async def run_full_competitor_scan_async(self) -> Dict:
+        """Run comprehensive scan on all competitors, scanning them concurrently."""
+        now = datetime.now()
+        now_iso = now.isoformat()
+        
+        per_competitor = await asyncio.gather(
+            *(self._scan_competitor(competitor, now, now_iso) for competitor in self.competitors)
+        )
+        all_insights = [insight for insights in per_competitor for insight in insights]
         
         # Store insights
-        self.insights_history.extend(all_insights)
+        self._record_insights(all_insights)
+        by_type, high_priority = self._summarize(all_insights)
         
         return {
-            "scan_date": datetime.now().isoformat(),
+            "scan_date": now_iso,
             "competitors_scanned": len(self.competitors),
             "insights_found": len(all_insights),
-            "insights_by_type": self._categorize_insights(all_insights),
-            "high_priority": [i for i in all_insights if i.confidence_score > 0.8],
+            "insights_by_type": by_type,
+            "high_priority": high_priority,
             "all_insights": all_insights
         }
     
-    def _categorize_insights(self, insights: List[CompetitorInsight]) -> Dict:
-        """Categorize insights by type."""
-        categories = {}
+    def run_full_competitor_scan(self) -> Dict:
+        """Run comprehensive scan on all competitors (blocking wrapper)."""
+        return asyncio.run(self.run_full_competitor_scan_async())
+    
+    def _record_insights(self, insights: List[CompetitorInsight]):
+        """Add insights to the history and its date/competitor indexes."""
+        for insight in insights:
+            detected = insight.ts
+            pos = bisect_right(self._insight_ts, detected)
+            self._insight_ts.insert(pos, detected)
+            self.insights_history.insert(pos, insight)
+            
+            stamps, items = self._by_competitor.setdefault(insight.competitor_name, ([], []))
+            pos = bisect_right(stamps, detected)
+            stamps.insert(pos, detected)
+            items.insert(pos, insight)
+    
+    def _summarize(self, insights: List[CompetitorInsight]) -> Tuple[Dict[str, int], List[CompetitorInsight]]:
+        """Count insights by type and collect high-confidence ones in a single pass."""
+        by_type = defaultdict(int)
+        high_priority = []
         for insight in insights:
-            if insight.insight_type not in categories:
-                categories[insight.insight_type] = []
-            categories[insight.insight_type].append(insight)
+            by_type[insight.insight_type] += 1
+            if insight.confidence_score > 0.8:
+                high_priority.append(insight)
         
-        return {k: len(v) for k, v in categories.items()}
+        return dict(by_type), high_priority
     
     def generate_competitive_report(self, days: int = 7) -> Dict:
         """Generate weekly competitive intelligence report."""
-        cutoff = datetime.now() - timedelta(days=days)
-        recent_insights = [
-            i for i in self.insights_history 
-            if i.date_detected > cutoff
-        ]
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        recent_insights = self.insights_history[bisect_right(self._insight_ts, cutoff):]
+        
+        by_competitor = {}
+        for name, (stamps, items) in self._by_competitor.items():
+            recent = items[bisect_right(stamps, cutoff):]
+            if recent:
+                by_competitor[name] = recent
+        
+        by_type, high_priority = self._summarize(recent_insights)
         
         return {
             "report_period": f"Last {days} days",
             "total_insights": len(recent_insights),
-            "by_competitor": self._group_by_competitor(recent_insights),
-            "by_type": self._categorize_insights(recent_insights),
-            "trends": self._identify_trends(recent_insights),
-            "recommendations": self._generate_strategic_recommendations(recent_insights)
+            "by_competitor": by_competitor,
+            "by_type": by_type,
+            "trends": self._identify_trends(recent_insights, by_type),
+            # Only high-confidence insights can produce recommendations
+            "recommendations": self._generate_strategic_recommendations(high_priority)
         }
     
-    def _group_by_competitor(self, insights: List[CompetitorInsight]) -> Dict:
-        """Group insights by competitor."""
-        grouped = {}
-        for insight in insights:
-            name = insight.competitor_name
-            if name not in grouped:
-                grouped[name] = []
-            grouped[name].append(insight)
-        return grouped
-    
-    def _identify_trends(self, insights: List[CompetitorInsight]) -> List[str]:
+    def _identify_trends(self, insights: List[CompetitorInsight],
+                         by_type: Dict[str, int]) -> List[str]:
         """Identify trends across insights."""
         trends = []
         
         # Check for AI focus
-        ai_count = sum(1 for i in insights if "ai" in i.description.lower())
+        ai_count = sum(1 for i in insights if "ai" in i.description_lower)
         if ai_count >= 3:
             trends.append(f"AI features: {ai_count} competitors launched AI capabilities")
         
         # Check for pricing changes
-        pricing_count = sum(1 for i in insights if i.insight_type == "pricing")
+        pricing_count = by_type.get("pricing", 0)
         if pricing_count >= 2:
             trends.append(f"Pricing pressure: {pricing_count} competitors adjusted pricing")
         
@@ -3,15 +3,22 @@ Content Generation Agent
 Creates blog posts, social media content, and marketing copy
 """
 import os
+import asyncio
+import itertools
 import logging
+import re
+import time
 from typing import Dict, List, Optional, Literal
 from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+_TEMPLATE_VAR_RE = re.compile(r"\{\{(\w+)\}\}")
+_HASHTAG_RE = re.compile(r"#\w+")
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ContentPiece:
     """Represents a piece of generated content."""
     content_id: str
@@ -38,9 +45,13 @@ class ContentGenerationAgent:
     - Ad copy (Google/Facebook)
     """
     
+    # Process-wide sequence so ids never collide, even within the same second
+    _id_counter = itertools.count()
+    
     def __init__(self, moonshot_api_key: Optional[str] = None):
         self.api_key = moonshot_api_key or os.getenv("MOONSHOT_API_KEY")
         self.model = "kimi-k2.5"
+        self._epoch = int(time.time())
         
         # Content templates
         self.templates = {
@@ -153,17 +164,7 @@ Guidelines:
                         keywords: Optional[List[str]] = None,
                         word_count: int = 500) -> ContentPiece:
         """Generate content based on type and parameters."""
-        
-        template = self.templates.get(content_type, self.templates["blog"])
-        
-        # Build prompt
-        keywords_str = ", ".join(keywords) if keywords else "relevant keywords"
-        
-        prompt = template.replace("{{topic}}", topic)
-        prompt = prompt.replace("{{audience}}", audience)
-        prompt = prompt.replace("{{tone}}", tone)
-        prompt = prompt.replace("{{keywords}}", keywords_str)
-        prompt = prompt.replace("{{word_count}}", str(word_count))
+        prompt = self._build_prompt(content_type, topic, audience, tone, keywords, word_count)
         
         # Call Kimi API (simulation for now)
         generated_content = self._call_kimi_api(prompt, content_type)
@@ -175,6 +176,32 @@ Guidelines:
         
         return content
     
+    async def generate_content_async(self, content_type: str, topic: str,
+                                     audience: str, tone: str = "professional",
+                                     keywords: Optional[List[str]] = None,
+                                     word_count: int = 500) -> ContentPiece:
+        """Async variant of generate_content; the blocking API call runs off-loop."""
+        prompt = self._build_prompt(content_type, topic, audience, tone, keywords, word_count)
+        generated_content = await asyncio.to_thread(self._call_kimi_api, prompt, content_type)
+        return self._parse_generated_content(generated_content, content_type, topic)
+    
+    def _build_prompt(self, content_type: str, topic: str, audience: str, tone: str,
+                      keywords: Optional[List[str]], word_count: int) -> str:
+        template = self.templates.get(content_type, self.templates["blog"])
+        
+        # Build prompt
+        keywords_str = ", ".join(keywords) if keywords else "relevant keywords"
+        
+        values = {
+            "topic": topic,
+            "audience": audience,
+            "tone": tone,
+            "keywords": keywords_str,
+            "word_count": str(word_count)
+        }
+        # Single pass; unknown placeholders (e.g. {{platform}}) are left as-is
+        return _TEMPLATE_VAR_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+    
     def _call_kimi_api(self, prompt: str, content_type: str) -> str:
         """Call Kimi K2.5 API to generate content."""
         # Simulation mode - would integrate with actual API
@@ -196,8 +223,7 @@ Guidelines:
         """Parse raw content into structured format."""
         
         # Extract hashtags
-        import re
-        hashtags = re.findall(r'#\w+', raw_content)
+        hashtags = _HASHTAG_RE.findall(raw_content)
         if not hashtags:
             hashtags = [f"#{topic.replace(' ', '')}", "#B2B", "#SaaS"]
         
@@ -209,7 +235,7 @@ Guidelines:
         seo_keywords = topic.lower().split()[:5]
         
         return ContentPiece(
-            content_id=f"{content_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            content_id=f"{content_type}_{self._epoch}_{next(self._id_counter)}",
             content_type=content_type,
             title=topic[:100],
             body=raw_content,
@@ -225,24 +251,38 @@ Guidelines:
                                  content_types: List[str],
                                  schedule_days: int = 30) -> List[Dict]:
         """Generate a full content calendar."""
-        calendar = []
-        
-        for i, topic in enumerate(topics):
-            content_type = content_types[i % len(content_types)]
-            
-            content = self.generate_content(
+        return asyncio.run(
+            self.generate_content_calendar_async(topics, content_types, schedule_days)
+        )
+    
+    async def generate_content_calendar_async(self, topics: List[str],
+                                              content_types: List[str],
+                                              schedule_days: int = 30) -> List[Dict]:
+        """Generate a full content calendar, producing all pieces concurrently."""
+        types = [content_types[i % len(content_types)] for i in range(len(topics))]
+        results = await asyncio.gather(
+            *(self.generate_content_async(
                 content_type=content_type,
                 topic=topic,
                 audience="B2B professionals",
                 tone="professional"
-            )
+            ) for topic, content_type in zip(topics, types)),
+            return_exceptions=True
+        )
+        
+        publish_date = datetime.now().strftime("%Y-%m-%d")
+        calendar = []
+        for i, (topic, content_type, content) in enumerate(zip(topics, types, results)):
+            if isinstance(content, Exception):
+                logger.error(f"Error generating {content_type} content for '{topic}': {content}")
+                continue
             
             calendar.append({
                 "day": i + 1,
                 "topic": topic,
                 "type": content_type,
                 "content": content,
-                "publish_date": datetime.now().strftime("%Y-%m-%d")
+                "publish_date": publish_date
             })
         
         return calendar
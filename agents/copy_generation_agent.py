@@ -2,17 +2,73 @@
 Copy Generation Agent
 Generates hyper-personalized outreach messages using templates and Kimi K2.5.
 """
-import json
+import asyncio
+import functools
 import logging
 import re
+import textwrap
+import time
+from collections import defaultdict
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
+import httpx
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from utils.kimi_http import HTTP2_AVAILABLE, ResponseCache
+
 logger = logging.getLogger(__name__)
 
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100)
 
-@dataclass
+# Quality-score checks, one C-level scan each. Corporate/CTA terms are matched as
+# substrings of the lowercased message ("leveraging" counts as jargon).
+_PLACEHOLDER_RE = re.compile(r"\[(?:Company|First Name|Agency|Your Name|X hours)\]")
+_CORPORATE_RE = re.compile(r"leverage|synergy|paradigm|utilize|holistic")
+_CTA_RE = re.compile(r"worth a|interested|chat|call|15-min|quick convo")
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Timeouts, rate limiting and server errors are transient; other failures are not."""
+    if isinstance(exc, httpx.TimeoutException):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+_kimi_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True
+)
+
+# "SUBJECT: ...\nBODY:\n..." reply format requested from Kimi
+_RESPONSE_RE = re.compile(r"SUBJECT:[ \t]*(?P<subject>[^\n]*)\n.*?BODY:\s*(?P<body>.*)", re.S)
+
+_COPYWRITER_ROLE = "You are an expert copywriter specializing in personalized LinkedIn outreach."
+
+# Prospect data embedded in prompts may carry non-string keys (json.dumps coerced them)
+_PROMPT_JSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Rough sizing for packed prompts (no tokenizer dependency): ~4 chars per token,
+# and an output allowance per packed message
+_CHARS_PER_TOKEN = 4
+_PACKED_MESSAGE_TOKENS = 400
+
+
+@functools.lru_cache(maxsize=None)
+def _load_templates_cached(path: str) -> Dict:
+    """Parse a template file once per process; the result is shared, treat it as read-only."""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+@dataclass(slots=True, frozen=True)
 class GeneratedMessage:
     prospect_id: str
     message_type: str
@@ -24,6 +80,120 @@ class GeneratedMessage:
     template_used: str
 
 
+class _AsyncRateLimiter:
+    """Token bucket allowing `rate` acquisitions per `period` seconds."""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+
+@dataclass
+class _Endpoint:
+    base_url: str
+    api_key: Optional[str]
+    concurrency_limit: int
+    client: Optional[httpx.AsyncClient] = None
+    unhealthy_until: float = 0.0
+
+
+class _KimiEndpointPool:
+    """
+    Spread chat-completion requests over one or more Kimi-compatible endpoints.
+    
+    Requests go into one shared queue drained by `concurrency_limit` workers per
+    endpoint, so faster endpoints naturally take more work. An HTTP error parks
+    the failing endpoint for `cooldown` seconds and requeues the request for
+    another endpoint, up to one attempt per endpoint.
+    """
+    
+    def __init__(self, endpoints: List[Dict], cooldown: float = 30.0):
+        self.endpoints = [
+            _Endpoint(ep["base_url"], ep.get("api_key"), ep.get("concurrency_limit", 10))
+            for ep in endpoints
+        ]
+        # With a single endpoint there is nothing to fail over to, so don't park it
+        self.cooldown = cooldown if len(self.endpoints) > 1 else 0.0
+        self.max_attempts = len(self.endpoints)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+    
+    async def __aenter__(self) -> "_KimiEndpointPool":
+        self._queue = asyncio.Queue()
+        for ep in self.endpoints:
+            ep.client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                headers={"Authorization": f"Bearer {ep.api_key}", "Content-Type": "application/json"},
+                timeout=60.0,
+                limits=_HTTP_LIMITS
+            )
+            self._workers.extend(
+                asyncio.create_task(self._worker(ep)) for _ in range(ep.concurrency_limit)
+            )
+        return self
+    
+    async def __aexit__(self, *exc):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for ep in self.endpoints:
+            await ep.client.aclose()
+    
+    async def complete(self, payload: Dict) -> str:
+        """Queue a chat-completion payload and wait for the message content."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((payload, future, 0))
+        return await future
+    
+    async def _worker(self, ep: _Endpoint):
+        while True:
+            delay = ep.unhealthy_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            payload, future, attempts = await self._queue.get()
+            if future.done():
+                continue
+            if ep.unhealthy_until > time.monotonic():
+                # Endpoint went down while we were waiting; let a healthy one take it
+                self._queue.put_nowait((payload, future, attempts))
+                continue
+            try:
+                response = await ep.client.post(f"{ep.base_url}/chat/completions",
+                                                content=orjson.dumps(payload))
+                response.raise_for_status()
+                content = orjson.loads(response.content)["choices"][0]["message"]["content"]
+            except httpx.HTTPError as e:
+                ep.unhealthy_until = time.monotonic() + self.cooldown
+                logger.warning(f"Kimi endpoint {ep.base_url} failed: {e}")
+                if attempts + 1 >= self.max_attempts:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self._queue.put_nowait((payload, future, attempts + 1))
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                # The caller may have been cancelled while the request was in flight
+                if not future.done():
+                    future.set_result(content)
+
+
 class CopyGenerationAgent:
     """Agent for generating personalized outreach messages."""
     
@@ -36,6 +206,55 @@ class CopyGenerationAgent:
         self.user_name = config.get("user_name", "Your Name")
         self.user_title = config.get("user_title", "AI Engineer")
         self.linkedin_profile = config.get("linkedin_profile_url", "")
+        self.max_concurrency = config.get("max_concurrency", 50)
+        self.qpm_limit = config.get("qpm_limit", 500)
+        self.endpoints = config.get("endpoints") or [{
+            "base_url": self.moonshot_base_url,
+            "api_key": self.moonshot_api_key,
+            "concurrency_limit": self.max_concurrency
+        }]
+        
+        # Repeated prompts (shared templates, reruns) are served from disk
+        cache_dir = config.get("cache_dir", ".kimi_cache")
+        self.cache = ResponseCache(
+            Path(cache_dir) / "copy_responses.sqlite3",
+            config.get("cache_ttl", 7 * 86400)
+        ) if cache_dir else None
+        
+        # One pooled client so repeat calls skip the TCP/TLS handshake
+        self._http = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            headers=self._kimi_headers(),
+            timeout=60.0,
+            limits=_HTTP_LIMITS
+        )
+        
+        # Created lazily per event loop (each asyncio.run gets a fresh loop)
+        self._guards_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._rate_limiter: Optional[_AsyncRateLimiter] = None
+        
+        # Fixed instructions are sent as a system message built once, so each request
+        # only carries template + prospect data and providers can cache the shared prefix
+        rules = textwrap.dedent(f"""\
+            1. Replace ALL placeholders like [Company], [First Name], [Agency Name], etc. with actual values
+            2. Use first name only (not full name)
+            3. Incorporate 1-2 pain signals naturally into the message
+            4. Add specific detail from personalization_data if available
+            5. Sign with: {self.user_name}
+            6. Keep tone conversational, not corporate
+            7. Keep length 100-150 words""")
+        self._personalize_system = (
+            f"{_COPYWRITER_ROLE}\n\nYOUR TASK:\n{rules}\n\n"
+            "Return ONLY the final message as:\nSUBJECT: [subject line]\nBODY:\n[message body]\n\n"
+            "No explanations, no markdown, just the message."
+        )
+        self._packed_system = (
+            f"{_COPYWRITER_ROLE}\n\nYOUR TASK (for EACH prospect, independently):\n{rules}\n\n"
+            "Return ONLY a JSON array with one object per prospect, in the same order, "
+            'each shaped as {"subject": "...", "body": "..."}.\n\n'
+            "No explanations, no markdown, just the JSON array."
+        )
         
         self.saas_templates = self._load_templates("linkedin_outreach_saas.json")
         self.agency_templates = self._load_templates("linkedin_outreach_agency.json")
@@ -43,41 +262,93 @@ class CopyGenerationAgent:
     def _load_templates(self, filename: str) -> Dict:
         """Load message templates from JSON."""
         try:
-            filepath = self.templates_path / filename
-            with open(filepath, 'r') as f:
-                return json.load(f)
+            return _load_templates_cached(str(self.templates_path / filename))
         except Exception as e:
             logger.error(f"Error loading templates {filename}: {e}")
             return {}
     
-    def _call_kimi(self, prompt: str, mode: str = "thinking") -> str:
-        """Call Kimi K2.5 API with thinking mode for quality."""
-        import requests
-        
-        headers = {
+    def _kimi_headers(self) -> Dict:
+        return {
             "Authorization": f"Bearer {self.moonshot_api_key}",
             "Content-Type": "application/json"
         }
-        
-        payload = {
+    
+    def _kimi_payload(self, prompt: str, max_tokens: int = 2000,
+                      system: Optional[str] = None) -> Dict:
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return {
             "model": self.config.get("moonshot_model", "kimi-k2.5"),
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages,
             "temperature": 0.7,
-            "max_tokens": 2000
+            "max_tokens": max_tokens
         }
-        
-        try:
-            response = requests.post(
-                f"{self.moonshot_base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-        except Exception as e:
-            logger.error(f"Kimi API error: {e}")
-            return ""
+    
+    @_kimi_retry
+    def _post_completion(self, payload: Dict) -> str:
+        response = self._http.post(
+            f"{self.moonshot_base_url}/chat/completions",
+            content=orjson.dumps(payload)
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)["choices"][0]["message"]["content"]
+    
+    def _call_kimi(self, prompt: str, mode: str = "thinking", max_tokens: int = 2000,
+                   system: Optional[str] = None) -> str:
+        """
+        Call Kimi K2.5 API with thinking mode for quality.
+        
+        Timeouts, 429s and 5xx responses are retried with jittered exponential
+        backoff; the last error is raised so callers can fall back explicitly.
+        """
+        payload = self._kimi_payload(prompt, max_tokens, system)
+        key = ResponseCache.key_for(payload)
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            return cached
+        
+        content = self._post_completion(payload)
+        
+        if self.cache and content:
+            self.cache.set(key, content)
+        return content
+    
+    async def _call_kimi_async(self, pool: _KimiEndpointPool, prompt: str,
+                               mode: str = "thinking", system: Optional[str] = None) -> str:
+        """Async variant of _call_kimi, dispatched through the endpoint pool."""
+        payload = self._kimi_payload(prompt, system=system)
+        key = ResponseCache.key_for(payload)
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            return cached
+        
+        self._ensure_guards()
+        async with self._sem:
+            await self._rate_limiter.acquire()
+            content = await self._complete_with_retry(pool, payload)
+        
+        if self.cache and content:
+            self.cache.set(key, content)
+        return content
+    
+    @_kimi_retry
+    async def _complete_with_retry(self, pool: _KimiEndpointPool, payload: Dict) -> str:
+        return await pool.complete(payload)
+    
+    def _ensure_guards(self):
+        """Bind the concurrency cap and QPM limiter to the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._guards_loop is not loop:
+            self._guards_loop = loop
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._rate_limiter = _AsyncRateLimiter(self.qpm_limit, 60.0)
+    
+    def _endpoint_pool(self) -> _KimiEndpointPool:
+        return _KimiEndpointPool(self.endpoints, self.config.get("endpoint_cooldown", 30.0))
+    
+    def close(self):
+        """Release pooled HTTP connections."""
+        self._http.close()
     
     def _calculate_quality_score(self, message: str, personalization_data: Dict) -> float:
         """Calculate quality score (0-10) for generated message."""
@@ -90,107 +361,96 @@ class CopyGenerationAgent:
         elif 60 <= word_count <= 200:
             score += 0.5
         
+        msg_lower = message.lower()
+        
         # Personalization elements present
         personalization_count = sum(1 for key, value in personalization_data.items() 
-                                    if value and str(value).lower() in message.lower())
+                                    if value and str(value).lower() in msg_lower)
         score += min(personalization_count * 0.5, 2.0)
         
         # No placeholder text remaining
-        placeholders = ["[Company]", "[First Name]", "[Agency]", "[Your Name]", "[X hours]"]
-        if not any(ph in message for ph in placeholders):
-            score += 1.0
-        else:
+        if _PLACEHOLDER_RE.search(message):
             score -= 2.0
+        else:
+            score += 1.0
         
         # Conversational tone (avoid corporate jargon)
-        corporate_words = ["leverage", "synergy", "paradigm", "utilize", "holistic"]
-        if not any(word in message.lower() for word in corporate_words):
+        if not _CORPORATE_RE.search(msg_lower):
             score += 0.5
         
         # Has clear CTA
-        if any(cta in message.lower() for cta in ["worth a", "interested", "chat", "call", "15-min", "quick convo"]):
+        if _CTA_RE.search(msg_lower):
             score += 0.5
         
         return round(max(min(score, 10.0), 1.0), 1)
     
     def _extract_personalization_elements(self, message: str, prospect_data: Dict) -> List[str]:
         """Extract which personalization elements were used."""
-        elements = []
-        
-        for key, value in prospect_data.get("personalization_data", {}).items():
-            if value and str(value).lower() in message.lower():
-                elements.append(key)
+        msg_lower = message.lower()
+        elements = [
+            key for key, value in prospect_data.get("personalization_data", {}).items()
+            if value and str(value).lower() in msg_lower
+        ]
         
-        if prospect_data.get("company") and prospect_data["company"].lower() in message.lower():
+        if prospect_data.get("company") and prospect_data["company"].lower() in msg_lower:
             elements.append("company_name")
         
-        if prospect_data.get("name", "").split()[0].lower() in message.lower():
+        if prospect_data.get("name", "").split()[0].lower() in msg_lower:
             elements.append("first_name")
         
         return elements
     
-    def personalize_message(self, prospect: Dict, template_key: Optional[str] = None) -> GeneratedMessage:
-        """Generate personalized message for a prospect."""
+    def _select_template(self, prospect: Dict, template_key: Optional[str]) -> tuple:
+        """Return (template_key, template) for a prospect's niche."""
         niche = prospect.get("niche", "saas")
         templates = self.saas_templates if niche == "saas" else self.agency_templates
         
-        # Select template
         if template_key and template_key in templates:
             template = templates[template_key]
         else:
-            template_key = prospect.get("recommended_template", list(templates.keys())[0])
-            template = templates.get(template_key, list(templates.values())[0])
+            template_key = prospect.get("recommended_template") or next(iter(templates))
+            template = templates[template_key] if template_key in templates else next(iter(templates.values()))
+        
+        return template_key, template
+    
+    def _build_personalization_prompt(self, prospect: Dict,
+                                      template_key: Optional[str]) -> tuple:
+        """Select a template and build the Kimi prompt for a prospect."""
+        template_key, template = self._select_template(prospect, template_key)
         
         # Build personalization data
         personalization = prospect.get("personalization_data", {})
-        first_name = prospect.get("name", "").split()[0]
-        company = prospect.get("company", "")
         
-        # Generate personalized message using Kimi
-        prompt = f"""You are an expert copywriter specializing in personalized LinkedIn outreach.
-        
-        ORIGINAL TEMPLATE:
-        Subject: {template['Subject']}
-        Body: {template['Body']}
-        
-        PROSPECT DATA:
-        - Name: {prospect.get('name')}
-        - Title: {prospect.get('title')}
-        - Company: {company}
-        - Stage: {prospect.get('company_stage')}
-        - Pain Signals: {', '.join(prospect.get('pain_signals', []))}
-        - Personalization Data: {json.dumps(personalization, indent=2)}
-        
-        YOUR TASK:
-        1. Replace ALL placeholders like [Company], [First Name], [Agency Name], etc. with actual values
-        2. Use first name only (not full name)
-        3. Incorporate 1-2 pain signals naturally into the message
-        4. Add specific detail from personalization_data if available
-        5. Sign with: {self.user_name}
-        6. Keep tone conversational, not corporate
-        7. Keep length 100-150 words
-        
-        Return ONLY the final message as:
-        SUBJECT: [subject line]
-        BODY:
-        [message body]
-        
-        No explanations, no markdown, just the message."""
-        
-        response = self._call_kimi(prompt, mode="thinking")
+        # Only the template and prospect data vary; instructions are in _personalize_system
+        prompt = (
+            "ORIGINAL TEMPLATE:\n"
+            f"Subject: {template['Subject']}\n"
+            f"Body: {template['Body']}\n"
+            "\n"
+            "PROSPECT DATA:\n"
+            f"- Name: {prospect.get('name')}\n"
+            f"- Title: {prospect.get('title')}\n"
+            f"- Company: {prospect.get('company', '')}\n"
+            f"- Stage: {prospect.get('company_stage')}\n"
+            f"- Pain Signals: {', '.join(prospect.get('pain_signals', []))}\n"
+            f"- Personalization Data: {orjson.dumps(personalization, option=_PROMPT_JSON_OPTS).decode()}"
+        )
         
-        # Parse response
-        subject = ""
-        body = ""
+        return template_key, template, prompt
+    
+    def _build_generated_message(self, prospect: Dict, template_key: str,
+                                 template: Dict, response: str) -> GeneratedMessage:
+        """Parse a Kimi response (or fall back to the template) and score it."""
+        m = _RESPONSE_RE.search(response)
+        subject, body = (m.group("subject").strip(), m.group("body").strip()) if m else ("", "")
         
-        if "SUBJECT:" in response:
-            lines = response.split("\n")
-            for i, line in enumerate(lines):
-                if "SUBJECT:" in line:
-                    subject = line.replace("SUBJECT:", "").strip()
-                elif "BODY:" in line:
-                    body = "\n".join(lines[i+1:]).strip()
-                    break
+        return self._finalize_message(prospect, template_key, template, subject, body)
+    
+    def _finalize_message(self, prospect: Dict, template_key: str, template: Dict,
+                          subject: str, body: str) -> GeneratedMessage:
+        """Fill from the template if the body is empty, then score the message."""
+        first_name = prospect.get("name", "").split()[0]
+        company = prospect.get("company", "")
         
         if not body:
             # Fallback: use template directly with simple replacement
@@ -215,20 +475,224 @@ class CopyGenerationAgent:
             template_used=template_key
         )
     
-    def generate_batch(self, prospects: List[Dict]) -> List[GeneratedMessage]:
-        """Generate messages for a batch of prospects."""
-        messages = []
+    def personalize_message(self, prospect: Dict, template_key: Optional[str] = None) -> GeneratedMessage:
+        """Generate personalized message for a prospect."""
+        template_key, template, prompt = self._build_personalization_prompt(prospect, template_key)
+        try:
+            response = self._call_kimi(prompt, mode="thinking", system=self._personalize_system)
+        except Exception as e:
+            logger.error(f"Kimi API error, using template for {prospect.get('name')}: {e}")
+            response = ""
+        return self._build_generated_message(prospect, template_key, template, response)
+    
+    @staticmethod
+    def _prospect_record(prospect: Dict) -> Dict:
+        return {
+            "name": prospect.get("name"),
+            "title": prospect.get("title"),
+            "company": prospect.get("company", ""),
+            "stage": prospect.get("company_stage"),
+            "pain_signals": prospect.get("pain_signals", []),
+            "personalization_data": prospect.get("personalization_data", {})
+        }
+    
+    def _build_packed_prompt(self, template: Dict, records: List[Dict]) -> str:
+        return (
+            "ORIGINAL TEMPLATE:\n"
+            f"Subject: {template['Subject']}\n"
+            f"Body: {template['Body']}\n"
+            "\n"
+            f"PROSPECTS ({len(records)}, return exactly {len(records)} objects):\n"
+            f"{orjson.dumps(records, option=_PROMPT_JSON_OPTS).decode()}"
+        )
+    
+    @staticmethod
+    def _parse_packed_response(response: str, expected: int) -> Optional[List[Dict]]:
+        """Extract the JSON array of messages; None if it is missing or malformed."""
+        start, end = response.find("["), response.rfind("]")
+        if start == -1 or end <= start:
+            return None
+        try:
+            items = orjson.loads(response[start:end + 1])
+        except ValueError:
+            return None
+        if (not isinstance(items, list) or len(items) != expected
+                or not all(isinstance(item, dict) and item.get("body") for item in items)):
+            return None
+        return items
+    
+    def _iter_packs(self, entries: List[tuple], pack_size: int):
+        """Chunk (index, prospect, record) entries by count and estimated prompt tokens."""
+        budget = self.config.get("pack_prompt_tokens", 6000)
+        pack, used = [], 0
+        for entry in entries:
+            cost = len(orjson.dumps(entry[2])) // _CHARS_PER_TOKEN + 1
+            if pack and (len(pack) >= pack_size or used + cost > budget):
+                yield pack
+                pack, used = [], 0
+            pack.append(entry)
+            used += cost
+        if pack:
+            yield pack
+    
+    def personalize_batch(self, prospects: List[Dict], pack_size: int = 8) -> List[GeneratedMessage]:
+        """
+        Generate messages for several prospects per Kimi call.
+        
+        Prospects sharing a niche and template are packed into one prompt that
+        carries the template once and asks for a JSON array of messages. A pack
+        whose reply can't be parsed falls back to one call per prospect.
+        """
+        groups = defaultdict(list)
+        for i, prospect in enumerate(prospects):
+            template_key, template = self._select_template(prospect, None)
+            groups[(prospect.get("niche", "saas"), template_key)].append(
+                (i, prospect, self._prospect_record(prospect))
+            )
         
+        results: List[Optional[GeneratedMessage]] = [None] * len(prospects)
+        for (niche, template_key), entries in groups.items():
+            template = self._select_template(entries[0][1], template_key)[1]
+            for pack in self._iter_packs(entries, pack_size):
+                items = None
+                api_failed = False
+                if len(pack) > 1:
+                    prompt = self._build_packed_prompt(template, [record for _, _, record in pack])
+                    try:
+                        response = self._call_kimi(prompt, mode="thinking",
+                                                   max_tokens=_PACKED_MESSAGE_TOKENS * len(pack),
+                                                   system=self._packed_system)
+                    except Exception as e:
+                        # Retries are exhausted; don't hammer the API once per prospect
+                        logger.error(f"Kimi API error, using template for {len(pack)} prospects: {e}")
+                        api_failed = True
+                    else:
+                        items = self._parse_packed_response(response, len(pack))
+                        if items is None:
+                            logger.warning(f"Packed reply for {len(pack)} prospects unusable, generating individually")
+                
+                for j, (i, prospect, _) in enumerate(pack):
+                    try:
+                        if api_failed:
+                            message = self._finalize_message(prospect, template_key, template, "", "")
+                        elif items is None:
+                            message = self.personalize_message(prospect, template_key)
+                        else:
+                            message = self._finalize_message(
+                                prospect, template_key, template,
+                                str(items[j].get("subject", "")).strip(),
+                                str(items[j]["body"]).strip()
+                            )
+                        results[i] = message
+                        logger.info(f"Generated message for {prospect.get('name')} - Score: {message.quality_score}")
+                    except Exception as e:
+                        logger.error(f"Error generating message for {prospect.get('name')}: {e}")
+        
+        return [m for m in results if m is not None]
+    
+    async def personalize_message_async(self, prospect: Dict,
+                                        template_key: Optional[str] = None,
+                                        pool: Optional[_KimiEndpointPool] = None) -> GeneratedMessage:
+        """Async variant of personalize_message; pass `pool` to share connections."""
+        template_key, template, prompt = self._build_personalization_prompt(prospect, template_key)
+        try:
+            if pool is None:
+                async with self._endpoint_pool() as pool:
+                    response = await self._call_kimi_async(pool, prompt, mode="thinking",
+                                                           system=self._personalize_system)
+            else:
+                response = await self._call_kimi_async(pool, prompt, mode="thinking",
+                                                       system=self._personalize_system)
+        except Exception as e:
+            logger.error(f"Kimi API error, using template for {prospect.get('name')}: {e}")
+            response = ""
+        return self._build_generated_message(prospect, template_key, template, response)
+    
+    async def _personalize_logged(self, pool: _KimiEndpointPool, prospect: Dict,
+                                  checkpoint=None,
+                                  checkpoint_lock: Optional[asyncio.Lock] = None) -> Optional[GeneratedMessage]:
+        try:
+            message = await self.personalize_message_async(prospect, pool=pool)
+            logger.info(f"Generated message for {prospect.get('name')} - Score: {message.quality_score}")
+        except Exception as e:
+            logger.error(f"Error generating message for {prospect.get('name')}: {e}")
+            return None
+        
+        if checkpoint is not None:
+            line = orjson.dumps(message) + b"\n"
+            async with checkpoint_lock:
+                await asyncio.to_thread(self._append_checkpoint_line, checkpoint, line)
+        return message
+    
+    @staticmethod
+    def _append_checkpoint_line(fh, line: bytes):
+        fh.write(line)
+        fh.flush()
+    
+    @staticmethod
+    def _load_checkpoint(path: Path) -> Dict[str, GeneratedMessage]:
+        """Read messages already written to a JSONL checkpoint, keyed by prospect_id."""
+        done = {}
+        if not path.exists():
+            return done
+        line = b"\n"
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    message = GeneratedMessage(**orjson.loads(line))
+                except (ValueError, TypeError):
+                    # Torn final line from an interrupted run
+                    continue
+                done[message.prospect_id] = message
+        if not line.endswith(b"\n"):
+            # Terminate the torn line so the next append starts cleanly
+            with open(path, 'ab') as f:
+                f.write(b"\n")
+        return done
+    
+    async def generate_batch_async(self, prospects: List[Dict],
+                                   output_jsonl: Optional[str] = None) -> List[GeneratedMessage]:
+        """
+        Generate messages for a batch of prospects concurrently.
+        
+        With `output_jsonl`, each message is appended to that file as soon as it
+        is generated and prospects already present in it are not regenerated,
+        so an interrupted batch can be resumed by calling again with the same path.
+        """
+        if output_jsonl is None:
+            async with self._endpoint_pool() as pool:
+                results = await asyncio.gather(
+                    *(self._personalize_logged(pool, p) for p in prospects)
+                )
+            return [m for m in results if m is not None]
+        
+        path = Path(output_jsonl)
+        done = self._load_checkpoint(path)
+        pending = [p for p in prospects if p.get("prospect_id") not in done]
+        if done:
+            logger.info(f"Resuming batch: {len(prospects) - len(pending)} prospects already in {path}")
+        
+        lock = asyncio.Lock()
+        with open(path, 'ab') as checkpoint:
+            async with self._endpoint_pool() as pool:
+                results = await asyncio.gather(
+                    *(self._personalize_logged(pool, p, checkpoint, lock) for p in pending)
+                )
+        
+        generated = {m.prospect_id: m for m in results if m is not None}
+        messages = []
         for prospect in prospects:
-            try:
-                message = self.personalize_message(prospect)
+            prospect_id = prospect.get("prospect_id")
+            message = done.get(prospect_id) or generated.get(prospect_id)
+            if message is not None:
                 messages.append(message)
-                logger.info(f"Generated message for {prospect.get('name')} - Score: {message.quality_score}")
-            except Exception as e:
-                logger.error(f"Error generating message for {prospect.get('name')}: {e}")
-        
         return messages
     
+    def generate_batch(self, prospects: List[Dict],
+                       output_jsonl: Optional[str] = None) -> List[GeneratedMessage]:
+        """Generate messages for a batch of prospects."""
+        return asyncio.run(self.generate_batch_async(prospects, output_jsonl))
+    
     def generate_followup(self, prospect: Dict, stage: int, conversation_history: List[Dict]) -> GeneratedMessage:
         """Generate follow-up message based on conversation stage."""
         
@@ -244,7 +708,7 @@ class CopyGenerationAgent:
         Stage: {stage} - {stage_prompts.get(stage, 'General follow-up')}
         
         Previous messages:
-        {json.dumps(conversation_history, indent=2)}
+        {orjson.dumps(conversation_history, option=_PROMPT_JSON_OPTS).decode()}
         
         Rules:
         - Keep it under 80 words
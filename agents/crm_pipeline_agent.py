@@ -2,16 +2,30 @@
 CRM & Pipeline Agent
 Auto-update CRM, track pipeline stages, flag high-priority opportunities, schedule tasks.
 """
-import json
+import atexit
+import bisect
+import itertools
 import logging
-from typing import List, Dict, Optional
+import os
+import threading
+import uuid
+from collections import defaultdict
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Set
 from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from enum import Enum
+from functools import cached_property
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# datetimes serialize natively; default=str only covers stray unsupported types
+_LOG_OPTS = orjson.OPT_NON_STR_KEYS
+_PRETTY_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
 
 class PipelineStage(Enum):
     PROSPECT = "prospect"
@@ -26,7 +40,7 @@ class PipelineStage(Enum):
     CLOSED_LOST = "closed_lost"
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     task_id: str
     prospect_id: str
@@ -38,23 +52,171 @@ class Task:
     completed_at: Optional[datetime] = None
 
 
+_ALL_STAGE_VALUES = tuple(stage.value for stage in PipelineStage)
+
+# Expected deal value of a prospect in each late pipeline stage
+_DEAL_VALUES: Mapping[str, int] = MappingProxyType({
+    PipelineStage.DISCOVERY_BOOKED.value: 8000,
+    PipelineStage.PROPOSAL_SENT.value: 10000,
+    PipelineStage.NEGOTIATION.value: 10000
+})
+
+# The CRM store: append-only JSONL event logs. The full-snapshot JSON files
+# they replaced are migrated on first load.
+PROSPECTS_LOG = Path("data/prospects.jsonl")
+TASKS_LOG = Path("data/tasks.jsonl")
+_LEGACY_PROSPECTS_FILE = Path("data/prospects.json")
+_LEGACY_TASKS_FILE = Path("data/tasks.json")
+
+
+class _WriteBehind:
+    """Background writer for the CRM data files.
+    
+    Callers queue appends and whole-file replacements and return at once; a
+    daemon thread writes them in order. Replacements go through a fsynced tmp
+    file and os.replace, and a queued replacement supersedes anything still
+    pending for that path, so bursts of saves collapse into one write.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: Dict[Path, list] = {}  # path -> [snapshot or None, appends]
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def append(self, path: Path, data: bytes):
+        with self._cond:
+            self._pending.setdefault(path, [None, []])[1].append(data)
+            self._wake()
+    
+    def replace(self, path: Path, data: bytes):
+        with self._cond:
+            self._pending[path] = [data, []]
+            self._wake()
+    
+    def drain(self):
+        """Block until every queued write is on disk."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending and not self._busy)
+    
+    def _wake(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="crm-writer", daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                path, (snapshot, appends) = self._pending.popitem()
+                self._busy = True
+            try:
+                if snapshot is not None:
+                    self._write_atomic(path, snapshot + b"".join(appends))
+                else:
+                    with open(path, 'ab') as f:
+                        f.write(b"".join(appends))
+                        f.flush()
+                        os.fsync(f.fileno())
+            except OSError as e:
+                logger.error(f"Failed to write {path}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+    
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+_writer = _WriteBehind()
+atexit.register(_writer.drain)
+
+
+def _task_due(task: Task) -> datetime:
+    return task.due_date
+
+
 class CRMPipelineAgent:
     """Agent for CRM management and pipeline tracking."""
     
+    # Rewrite the prospect log once it holds this many events per live prospect
+    COMPACT_FACTOR = 10
+    COMPACT_MIN_PROSPECTS = 100
+    
+    # Untouched prospects at or above this score are ready for outreach
+    READY_MIN_PRIORITY = 7.0
+    
+    # Follow-up task created on entering a stage:
+    # (task_type, description format, due after, priority)
+    _STAGE_HANDLERS = {
+        # High-priority lead - create task for discovery call
+        PipelineStage.QUALIFIED.value: (
+            "discovery_call", "Book discovery call with {name} at {company}", timedelta(days=2), "high"
+        ),
+        # Prepare call briefing
+        PipelineStage.DISCOVERY_BOOKED.value: (
+            "prep_call", "Prepare discovery call briefing for {name}", timedelta(hours=2), "medium"
+        ),
+        # Follow up on proposal
+        PipelineStage.PROPOSAL_SENT.value: (
+            "proposal_followup", "Follow up on proposal sent to {name}", timedelta(days=3), "high"
+        ),
+        # Onboarding task
+        PipelineStage.CLOSED_WON.value: (
+            "project_kickoff", "Schedule project kickoff with {name}", timedelta(days=2), "high"
+        ),
+    }
+    
     def __init__(self, config: Dict, crm_type: str = "json"):
         self.config = config
         self.crm_type = crm_type  # "json", "airtable", "sheets"
-        self.data_path = Path("data/prospects.json")
-        self.tasks_path = Path("data/tasks.json")
+        self.data_path = PROSPECTS_LOG
+        self.tasks_path = TASKS_LOG
         self.analytics_path = Path("data/analytics.json")
+        self._legacy_data_path = _LEGACY_PROSPECTS_FILE
+        self._legacy_tasks_path = _LEGACY_TASKS_FILE
         
         # Ensure data directory exists
         self.data_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Load or initialize data
+        # Bumped on every prospect/task mutation so callers can key caches on it
+        self.revision = 0
+        
+        # Encoded events not yet appended (mutations made with save=False)
+        self._pending_prospect_events: List[bytes] = []
+        self._pending_task_events: List[bytes] = []
+        self._prospect_log_lines = 0
+        
+        # Load or initialize data, after any writes still queued by another
+        # instance; tasks and analytics are loaded on first use
+        _writer.drain()
         self.prospects: Dict[str, Dict] = self._load_prospects()
-        self.tasks: List[Task] = self._load_tasks()
-        self.analytics: Dict = self._load_analytics()
+        
+        # stage -> prospect_ids, kept in step with every stage change
+        self.stage_index: Dict[str, Set[str]] = defaultdict(set)
+        for prospect_id, prospect in self.prospects.items():
+            self.stage_index[prospect.get("stage", PipelineStage.PROSPECT.value)].add(prospect_id)
+        
+        # Outreach-ready prospects sorted by (-priority_score, arrival, id)
+        self._ready_seq = itertools.count()
+        self._ready_keys: Dict[str, tuple] = {}
+        for prospect_id, prospect in self.prospects.items():
+            key = self._ready_key(prospect_id, prospect)
+            if key:
+                self._ready_keys[prospect_id] = key
+        self._ready: List[tuple] = sorted(self._ready_keys.values())
+        
+        # Bumped on every analytics write; keys the weekly-metrics cache
+        self._analytics_version = 0
+        self._weekly_metrics_cache: Optional[tuple] = None
         
         # Pipeline stage progression rules
         self.stage_flow = {
@@ -68,36 +230,135 @@ class CRMPipelineAgent:
             PipelineStage.NEGOTIATION: [PipelineStage.CLOSED_WON, PipelineStage.CLOSED_LOST],
         }
     
+    def _ready_key(self, prospect_id: str, prospect: Dict) -> Optional[tuple]:
+        score = prospect.get("priority_score", 0)
+        if prospect.get("stage") == PipelineStage.PROSPECT.value and score >= self.READY_MIN_PRIORITY:
+            return (-score, next(self._ready_seq), prospect_id)
+        return None
+    
+    def _update_ready(self, prospect_id: str):
+        """Re-file a prospect in the outreach-ready ordering after a change."""
+        old_key = self._ready_keys.pop(prospect_id, None)
+        if old_key:
+            del self._ready[bisect.bisect_left(self._ready, old_key)]
+        key = self._ready_key(prospect_id, self.prospects[prospect_id])
+        if key:
+            self._ready_keys[prospect_id] = key
+            bisect.insort(self._ready, key)
+    
+    @cached_property
+    def tasks(self) -> List[Task]:
+        _writer.drain()
+        tasks = self._load_tasks()
+        # Tasks ordered by due_date so daily lookups are a bisect, not a scan
+        self._tasks_by_date: List[Task] = sorted(tasks, key=_task_due)
+        return tasks
+    
+    @cached_property
+    def analytics(self) -> Dict:
+        _writer.drain()
+        return self._load_analytics()
+    
+    @staticmethod
+    def _read_log(path: Path) -> tuple:
+        """Return (events, torn) for a JSONL log; a torn final line is dropped."""
+        events = []
+        line = b"\n"
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    events.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    continue
+        return events, not line.endswith(b"\n")
+    
+    @staticmethod
+    def _append_events(path: Path, lines: List[bytes]):
+        _writer.append(path, b"".join(lines))
+    
+    @staticmethod
+    def _rewrite_log(path: Path, lines: List[bytes]):
+        """Atomically replace a log with the given lines."""
+        _writer.replace(path, b"".join(lines))
+    
+    @staticmethod
+    def _apply_prospect_event(prospects: Dict[str, Dict], event: Dict):
+        if event["op"] == "put":
+            prospects[event["id"]] = event["record"]
+            return
+        prospect = prospects.get(event["id"])
+        if prospect is None:
+            return
+        if "entry" in event:
+            prospect.setdefault("outreach_log", []).append(event["entry"])
+        prospect.update(event.get("fields", {}))
+    
     def _load_prospects(self) -> Dict[str, Dict]:
-        """Load prospects from storage."""
-        if self.data_path.exists():
-            with open(self.data_path, 'r') as f:
-                return json.load(f)
-        return {}
+        """Load prospects by replaying the event log."""
+        if not self.data_path.exists():
+            if not self._legacy_data_path.exists():
+                return {}
+            with open(self._legacy_data_path, 'rb') as f:
+                prospects = orjson.loads(f.read())
+            self._compact_prospects(prospects)
+            return prospects
+        
+        events, torn = self._read_log(self.data_path)
+        prospects = {}
+        for event in events:
+            self._apply_prospect_event(prospects, event)
+        self._prospect_log_lines = len(events)
+        
+        if torn or self._needs_compaction(len(prospects)):
+            self._compact_prospects(prospects)
+        return prospects
     
-    def _save_prospects(self):
-        """Save prospects to storage."""
-        with open(self.data_path, 'w') as f:
-            json.dump(self.prospects, f, indent=2, default=str)
+    def _needs_compaction(self, live: int) -> bool:
+        return self._prospect_log_lines > self.COMPACT_FACTOR * max(live, self.COMPACT_MIN_PROSPECTS)
+    
+    def _compact_prospects(self, prospects: Dict[str, Dict]):
+        """Rewrite the prospect log as one put event per live prospect."""
+        lines = [self._encode({"op": "put", "id": pid, "record": p}) for pid, p in prospects.items()]
+        self._rewrite_log(self.data_path, lines)
+        self._prospect_log_lines = len(lines)
     
     def _load_tasks(self) -> List[Task]:
-        """Load tasks from storage."""
-        if self.tasks_path.exists():
-            with open(self.tasks_path, 'r') as f:
-                data = json.load(f)
-                return [Task(**t) for t in data]
-        return []
-    
-    def _save_tasks(self):
-        """Save tasks to storage."""
-        with open(self.tasks_path, 'w') as f:
-            json.dump([asdict(t) for t in self.tasks], f, indent=2, default=str)
+        """Load tasks by replaying the task log."""
+        if not self.tasks_path.exists():
+            if not self._legacy_tasks_path.exists():
+                return []
+            with open(self._legacy_tasks_path, 'rb') as f:
+                tasks = [self._task_from_dict(t) for t in orjson.loads(f.read())]
+            self._rewrite_log(self.tasks_path, [self._encode({"op": "put", "task": asdict(t)}) for t in tasks])
+            return tasks
+        
+        events, torn = self._read_log(self.tasks_path)
+        by_id = {}
+        for event in events:
+            by_id[event["task"]["task_id"]] = event["task"]
+        tasks = [self._task_from_dict(t) for t in by_id.values()]
+        
+        if torn or len(events) != len(tasks):
+            self._rewrite_log(self.tasks_path, [self._encode({"op": "put", "task": asdict(t)}) for t in tasks])
+        return tasks
+    
+    @staticmethod
+    def _task_from_dict(data: Dict) -> Task:
+        """Rebuild a Task, parsing the ISO timestamps JSON stored as strings."""
+        for key in ("due_date", "completed_at"):
+            if isinstance(data.get(key), str):
+                data[key] = datetime.fromisoformat(data[key])
+        return Task(**data)
+    
+    @staticmethod
+    def _encode(event: Dict) -> bytes:
+        return orjson.dumps(event, default=str, option=_LOG_OPTS | orjson.OPT_APPEND_NEWLINE)
     
     def _load_analytics(self) -> Dict:
         """Load analytics data."""
         if self.analytics_path.exists():
-            with open(self.analytics_path, 'r') as f:
-                return json.load(f)
+            with open(self.analytics_path, 'rb') as f:
+                return orjson.loads(f.read())
         return {
             "daily_metrics": {},
             "weekly_metrics": {},
@@ -107,105 +368,118 @@ class CRMPipelineAgent:
     
     def _save_analytics(self):
         """Save analytics data."""
-        with open(self.analytics_path, 'w') as f:
-            json.dump(self.analytics, f, indent=2, default=str)
+        _writer.replace(self.analytics_path, orjson.dumps(self.analytics, default=str, option=_PRETTY_OPTS))
+    
+    def flush(self, wait: bool = False):
+        """Queue any events recorded since the last save for the background
+        writer; with wait=True, block until everything is on disk."""
+        if self._pending_prospect_events:
+            self._append_events(self.data_path, self._pending_prospect_events)
+            self._prospect_log_lines += len(self._pending_prospect_events)
+            self._pending_prospect_events = []
+            if self._needs_compaction(len(self.prospects)):
+                self._compact_prospects(self.prospects)
+        if self._pending_task_events:
+            self._append_events(self.tasks_path, self._pending_task_events)
+            self._pending_task_events = []
+        if wait:
+            _writer.drain()
+    
+    def _record_prospect_event(self, event: Dict, save: bool):
+        self.revision += 1
+        # Encode now so later in-memory mutations can't leak into this event
+        self._pending_prospect_events.append(self._encode(event))
+        if save:
+            self.flush()
     
-    def add_prospect(self, prospect: Dict) -> str:
-        """Add a new prospect to CRM."""
+    def _record_task_event(self, task: Task, save: bool):
+        self.revision += 1
+        self._pending_task_events.append(self._encode({"op": "put", "task": asdict(task)}))
+        if save:
+            self.flush()
+    
+    def add_prospect(self, prospect: Dict, save: bool = True,
+                     now: Optional[datetime] = None) -> str:
+        """Add a new prospect to CRM. Pass save=False to defer writing until flush();
+        batch callers can pass one shared `now` timestamp."""
         prospect_id = prospect.get("prospect_id")
         
         if prospect_id in self.prospects:
             logger.warning(f"Prospect {prospect_id} already exists, updating")
+            self.stage_index[self.prospects[prospect_id].get("stage", PipelineStage.PROSPECT.value)].discard(prospect_id)
         
+        now_iso = (now or datetime.now()).isoformat()
         prospect["stage"] = PipelineStage.PROSPECT.value
-        prospect["stage_changed_at"] = datetime.now().isoformat()
+        prospect["stage_changed_at"] = now_iso
         prospect["outreach_log"] = []
-        prospect["created_at"] = datetime.now().isoformat()
+        prospect["created_at"] = now_iso
         prospect["last_touch"] = None
         
         self.prospects[prospect_id] = prospect
-        self._save_prospects()
+        self.stage_index[PipelineStage.PROSPECT.value].add(prospect_id)
+        self._update_ready(prospect_id)
+        self._record_prospect_event({"op": "put", "id": prospect_id, "record": prospect}, save)
         
         logger.info(f"Added prospect {prospect.get('name')} to CRM")
         return prospect_id
     
     def add_prospects_batch(self, prospects: List[Dict]) -> List[str]:
         """Add multiple prospects to CRM."""
-        ids = []
-        for prospect in prospects:
-            pid = self.add_prospect(prospect)
-            ids.append(pid)
+        now = datetime.now()
+        ids = [self.add_prospect(prospect, save=False, now=now) for prospect in prospects]
+        self.flush()
         return ids
     
-    def update_status(self, prospect_id: str, new_stage: str) -> bool:
+    def update_status(self, prospect_id: str, new_stage: str, save: bool = True,
+                      now: Optional[datetime] = None) -> bool:
         """Update prospect pipeline stage."""
         if prospect_id not in self.prospects:
             logger.error(f"Prospect {prospect_id} not found")
             return False
         
         old_stage = self.prospects[prospect_id].get("stage")
+        now = now or datetime.now()
         
-        self.prospects[prospect_id]["stage"] = new_stage
-        self.prospects[prospect_id]["stage_changed_at"] = datetime.now().isoformat()
+        fields = {"stage": new_stage, "stage_changed_at": now.isoformat()}
+        self.prospects[prospect_id].update(fields)
+        self.stage_index[old_stage or PipelineStage.PROSPECT.value].discard(prospect_id)
+        self.stage_index[new_stage].add(prospect_id)
+        self._update_ready(prospect_id)
         
         # Trigger stage-specific actions
-        self._handle_stage_change(prospect_id, old_stage, new_stage)
+        self._handle_stage_change(prospect_id, old_stage, new_stage, save, now)
         
-        self._save_prospects()
+        self._record_prospect_event({"op": "patch", "id": prospect_id, "fields": fields}, save)
         logger.info(f"Updated {prospect_id}: {old_stage} -> {new_stage}")
         return True
     
-    def _handle_stage_change(self, prospect_id: str, old_stage: str, new_stage: str):
+    def _handle_stage_change(self, prospect_id: str, old_stage: str, new_stage: str,
+                             save: bool = True, now: Optional[datetime] = None):
         """Handle actions triggered by stage changes."""
-        prospect = self.prospects[prospect_id]
+        handler = self._STAGE_HANDLERS.get(new_stage)
+        if handler is None:
+            return
         
-        if new_stage == PipelineStage.QUALIFIED.value:
-            # High-priority lead - create task for discovery call
-            self.create_task(
-                prospect_id=prospect_id,
-                task_type="discovery_call",
-                description=f"Book discovery call with {prospect.get('name')} at {prospect.get('company')}",
-                due_date=datetime.now() + timedelta(days=2),
-                priority="high"
-            )
-            
-        elif new_stage == PipelineStage.DISCOVERY_BOOKED.value:
-            # Prepare call briefing
-            self.create_task(
-                prospect_id=prospect_id,
-                task_type="prep_call",
-                description=f"Prepare discovery call briefing for {prospect.get('name')}",
-                due_date=datetime.now() + timedelta(hours=2),
-                priority="medium"
-            )
-            
-        elif new_stage == PipelineStage.PROPOSAL_SENT.value:
-            # Follow up on proposal
-            self.create_task(
-                prospect_id=prospect_id,
-                task_type="proposal_followup",
-                description=f"Follow up on proposal sent to {prospect.get('name')}",
-                due_date=datetime.now() + timedelta(days=3),
-                priority="high"
-            )
-            
-        elif new_stage == PipelineStage.CLOSED_WON.value:
-            # Onboarding task
-            self.create_task(
-                prospect_id=prospect_id,
-                task_type="project_kickoff",
-                description=f"Schedule project kickoff with {prospect.get('name')}",
-                due_date=datetime.now() + timedelta(days=2),
-                priority="high"
-            )
+        task_type, description_fmt, delay, priority = handler
+        prospect = self.prospects[prospect_id]
+        self.create_task(
+            prospect_id=prospect_id,
+            task_type=task_type,
+            description=description_fmt.format(name=prospect.get("name"), company=prospect.get("company")),
+            due_date=(now or datetime.now()) + delay,
+            priority=priority,
+            save=save
+        )
     
-    def log_outreach_action(self, prospect_id: str, action_type: str, details: Dict):
+    def log_outreach_action(self, prospect_id: str, action_type: str, details: Dict,
+                            save: bool = True, now: Optional[datetime] = None):
         """Log an outreach action to prospect history."""
         if prospect_id not in self.prospects:
             return
         
+        now_iso = (now or datetime.now()).isoformat()
         log_entry = {
-            "date": datetime.now().isoformat(),
+            "date": now_iso,
             "action": action_type,
             "details": details
         }
@@ -213,16 +487,21 @@ class CRMPipelineAgent:
         if "outreach_log" not in self.prospects[prospect_id]:
             self.prospects[prospect_id]["outreach_log"] = []
         
+        fields = {"last_touch": now_iso}
         self.prospects[prospect_id]["outreach_log"].append(log_entry)
-        self.prospects[prospect_id]["last_touch"] = datetime.now().isoformat()
+        self.prospects[prospect_id].update(fields)
         
-        self._save_prospects()
+        self._record_prospect_event(
+            {"op": "patch", "id": prospect_id, "entry": log_entry, "fields": fields}, save
+        )
     
     def create_task(self, prospect_id: str, task_type: str, description: str, 
-                   due_date: datetime, priority: str = "medium") -> Task:
+                   due_date: datetime, priority: str = "medium", save: bool = True) -> Task:
         """Create a new task."""
+        tasks = self.tasks  # loads the task store on first use
         task = Task(
-            task_id=f"{prospect_id}_{task_type}_{int(datetime.now().timestamp())}",
+            # Random suffix: several agents may write tasks to the same store
+            task_id=f"{prospect_id}_{task_type}_{uuid.uuid4().hex[:12]}",
             prospect_id=prospect_id,
             task_type=task_type,
             description=description,
@@ -230,50 +509,43 @@ class CRMPipelineAgent:
             priority=priority
         )
         
-        self.tasks.append(task)
-        self._save_tasks()
+        tasks.append(task)
+        bisect.insort(self._tasks_by_date, task, key=_task_due)
+        self._record_task_event(task, save)
         
         logger.info(f"Created task: {description}")
         return task
     
     def get_daily_tasks(self) -> List[Task]:
         """Get tasks due today."""
-        today = datetime.now().replace(hour=23, minute=59, second=59)
-        today_start = datetime.now().replace(hour=0, minute=0, second=0)
+        now = datetime.now()
+        today = now.replace(hour=23, minute=59, second=59)
+        today_start = now.replace(hour=0, minute=0, second=0)
         
-        return [
-            t for t in self.tasks 
-            if t.status == "pending" 
-            and today_start <= t.due_date <= today
-        ]
+        self.tasks  # make sure the due_date ordering has been built
+        lo = bisect.bisect_left(self._tasks_by_date, today_start, key=_task_due)
+        hi = bisect.bisect_right(self._tasks_by_date, today, key=_task_due)
+        return [t for t in self._tasks_by_date[lo:hi] if t.status == "pending"]
+    
+    def get_ready_for_outreach(self, limit: int) -> List[Dict]:
+        """Get up to `limit` uncontacted prospects scoring at least
+        READY_MIN_PRIORITY, highest priority first."""
+        return [self.prospects[prospect_id] for _, _, prospect_id in self._ready[:limit]]
     
     def get_high_priority_leads(self) -> List[Dict]:
         """Get high-priority qualified leads."""
+        qualified = self.stage_index.get(PipelineStage.QUALIFIED.value, ())
         return [
-            p for p in self.prospects.values()
-            if p.get("stage") == PipelineStage.QUALIFIED.value
-            and p.get("priority_score", 0) >= 7.0
+            p for p in (self.prospects[pid] for pid in qualified)
+            if p.get("priority_score", 0) >= 7.0
         ]
     
     def get_pipeline_summary(self) -> Dict:
         """Get pipeline stage counts."""
-        stages = {stage.value: 0 for stage in PipelineStage}
-        
-        for prospect in self.prospects.values():
-            stage = prospect.get("stage", "prospect")
-            if stage in stages:
-                stages[stage] += 1
+        stages = {stage: len(self.stage_index.get(stage, ())) for stage in _ALL_STAGE_VALUES}
         
         # Calculate pipeline value
-        pipeline_value = 0
-        deal_values = {
-            PipelineStage.DISCOVERY_BOOKED.value: 8000,
-            PipelineStage.PROPOSAL_SENT.value: 10000,
-            PipelineStage.NEGOTIATION.value: 10000
-        }
-        
-        for stage, value in deal_values.items():
-            pipeline_value += stages.get(stage, 0) * value
+        pipeline_value = sum(stages[stage] * value for stage, value in _DEAL_VALUES.items())
         
         return {
             "stage_counts": stages,
@@ -294,10 +566,18 @@ class CRMPipelineAgent:
             self.analytics["daily_metrics"][today] = {}
         
         self.analytics["daily_metrics"][today][metric_type] = data
+        self._analytics_version += 1
         self._save_analytics()
     
     def get_weekly_metrics(self) -> Dict:
         """Get metrics for the past 7 days."""
+        today = date.today()
+        key = (today, self._analytics_version)
+        if self._weekly_metrics_cache is None or self._weekly_metrics_cache[0] != key:
+            self._weekly_metrics_cache = (key, self._compute_weekly_metrics(today))
+        return dict(self._weekly_metrics_cache[1])
+    
+    def _compute_weekly_metrics(self, today: date) -> Dict:
         metrics = {
             "connections_sent": 0,
             "connections_accepted": 0,
@@ -308,10 +588,11 @@ class CRMPipelineAgent:
             "revenue": 0
         }
         
+        daily_metrics = self.analytics["daily_metrics"]
         for i in range(7):
-            date_str = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            if date_str in self.analytics["daily_metrics"]:
-                day_data = self.analytics["daily_metrics"][date_str]
+            date_str = (today - timedelta(days=i)).isoformat()
+            if date_str in daily_metrics:
+                day_data = daily_metrics[date_str]
                 for key in metrics:
                     if key in day_data:
                         metrics[key] += day_data[key].get("count", 0)
@@ -334,22 +615,57 @@ class CRMPipelineAgent:
         return metrics
     
     def export_report(self, filepath: str):
-        """Export full CRM report."""
-        report = {
-            "generated_at": datetime.now().isoformat(),
-            "pipeline_summary": self.get_pipeline_summary(),
-            "weekly_metrics": self.get_weekly_metrics(),
-            "high_priority_leads": self.get_high_priority_leads(),
-            "pending_tasks": len([t for t in self.tasks if t.status == "pending"]),
-            "total_tasks": len(self.tasks)
-        }
+        """Export full CRM report, streaming high-priority leads one at a time."""
+        def dumps(obj) -> bytes:
+            return orjson.dumps(obj, default=str, option=_LOG_OPTS)
+        
+        pending_tasks = sum(1 for t in self.tasks if t.status == "pending")
         
-        with open(filepath, 'w') as f:
-            json.dump(report, f, indent=2, default=str)
+        with open(filepath, 'wb') as f:
+            f.write(b'{\n"generated_at": ' + dumps(datetime.now().isoformat()))
+            f.write(b',\n"pipeline_summary": ' + dumps(self.get_pipeline_summary()))
+            f.write(b',\n"weekly_metrics": ' + dumps(self.get_weekly_metrics()))
+            f.write(b',\n"high_priority_leads": [')
+            separator = b"\n"
+            for prospect_id in self.stage_index.get(PipelineStage.QUALIFIED.value, ()):
+                prospect = self.prospects[prospect_id]
+                if prospect.get("priority_score", 0) >= 7.0:
+                    f.write(separator + dumps(prospect))
+                    separator = b",\n"
+            f.write(b'\n],\n"pending_tasks": ' + dumps(pending_tasks))
+            f.write(b',\n"total_tasks": ' + dumps(len(self.tasks)) + b'\n}\n')
         
         logger.info(f"Exported CRM report to {filepath}")
 
 
+def read_prospects() -> Dict[str, Dict]:
+    """Read-only snapshot of the prospect store for other processes (dashboard,
+    exports). Unlike CRMPipelineAgent it never migrates or compacts the files."""
+    if not PROSPECTS_LOG.exists():
+        if not _LEGACY_PROSPECTS_FILE.exists():
+            return {}
+        with open(_LEGACY_PROSPECTS_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    
+    events, _ = CRMPipelineAgent._read_log(PROSPECTS_LOG)
+    prospects = {}
+    for event in events:
+        CRMPipelineAgent._apply_prospect_event(prospects, event)
+    return prospects
+
+
+def read_tasks() -> List[Dict]:
+    """Read-only snapshot of the task store as plain dicts (ISO date strings)."""
+    if not TASKS_LOG.exists():
+        if not _LEGACY_TASKS_FILE.exists():
+            return []
+        with open(_LEGACY_TASKS_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    
+    events, _ = CRMPipelineAgent._read_log(TASKS_LOG)
+    return list({event["task"]["task_id"]: event["task"] for event in events}.values())
+
+
 if __name__ == "__main__":
     agent = CRMPipelineAgent({})
     
@@ -3,16 +3,72 @@ Email Automation Agent
 Sends personalized cold emails via SendGrid/SES with tracking
 """
 import os
+import re
 import logging
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import time
 
 logger = logging.getLogger(__name__)
 
+# Multiline so a whole newline-joined address list is checked in one findall
+_EMAIL_RE = re.compile(r'(?m)^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_TEMPLATE_VARS = ("first_name", "last_name", "company", "title", "industry", "pain_point", "custom_hook")
+_TEMPLATE_RE = re.compile(r'\{\{(' + '|'.join(_TEMPLATE_VARS) + r')\}\}')
 
-@dataclass
+_PIXEL_FMT = '<img src="https://tracker.example.com/pixel/{}" width="1" height="1" />'
+
+# SendGrid accepts at most this many personalizations per mail/send request
+_SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+def _compile_template(template: str) -> Callable[[Dict], str]:
+    """Parse a template once into a renderer that only joins literals and values."""
+    parts = _TEMPLATE_RE.split(template)
+    head, literals, names = parts[0], parts[2::2], parts[1::2]
+    
+    def render(prospect: Dict) -> str:
+        chunks = [head]
+        for name, literal in zip(names, literals):
+            chunks.append(str(prospect.get(name, "")))
+            chunks.append(literal)
+        return "".join(chunks)
+    
+    return render
+
+
+def _next_midnight_epoch() -> float:
+    """Epoch seconds of the next local midnight."""
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+
+class _RateLimiter:
+    """Thread-safe token bucket allowing `rate` acquisitions per `period` seconds."""
+    
+    def __init__(self, rate: int, period: float):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) * self.period / self.rate)
+
+
+@dataclass(slots=True)
 class EmailCampaign:
     """Represents an email campaign."""
     campaign_id: str
@@ -22,9 +78,12 @@ class EmailCampaign:
     prospects: List[Dict]
     scheduled_time: Optional[datetime] = None
     status: str = "draft"  # draft, scheduled, sending, complete
+    # SendGrid dynamic template to send through; its data includes the rendered
+    # subject/body, so the template can lay them out
+    sendgrid_template_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class EmailResult:
     """Result of sending an email."""
     prospect_id: str
@@ -61,6 +120,8 @@ class EmailAutomationAgent:
         self.daily_sent = 0
         self.daily_limit = int(os.getenv("DAILY_EMAIL_LIMIT", "100"))
         self.last_reset = datetime.now()
+        self._next_reset_ts = _next_midnight_epoch()
+        self._count_lock = threading.Lock()
         
         self._init_clients()
     
@@ -92,10 +153,14 @@ class EmailAutomationAgent:
     
     def _reset_daily_counter(self):
         """Reset daily send counter."""
-        now = datetime.now()
-        if now.date() > self.last_reset.date():
+        if time.time() >= self._next_reset_ts:
             self.daily_sent = 0
-            self.last_reset = now
+            self.last_reset = datetime.now()
+            self._next_reset_ts = _next_midnight_epoch()
+    
+    def _count_sent(self):
+        with self._count_lock:
+            self.daily_sent += 1
     
     def _check_rate_limit(self) -> bool:
         """Check if we can send more emails today."""
@@ -104,23 +169,13 @@ class EmailAutomationAgent:
     
     def personalize_template(self, template: str, prospect: Dict) -> str:
         """Personalize email template with prospect data."""
-        result = template
-        
-        # Replace variables
-        variables = {
-            "{{first_name}}": prospect.get("first_name", ""),
-            "{{last_name}}": prospect.get("last_name", ""),
-            "{{company}}": prospect.get("company", ""),
-            "{{title}}": prospect.get("title", ""),
-            "{{industry}}": prospect.get("industry", ""),
-            "{{pain_point}}": prospect.get("pain_point", ""),
-            "{{custom_hook}}": prospect.get("custom_hook", ""),
-        }
-        
-        for var, value in variables.items():
-            result = result.replace(var, str(value))
-        
-        return result
+        # Replace all variables in one pass over the template
+        return _TEMPLATE_RE.sub(lambda m: str(prospect.get(m.group(1), "")), template)
+    
+    def _render(self, template: Union[str, Callable[[Dict], str]], prospect: Dict) -> str:
+        if callable(template):
+            return template(prospect)
+        return self.personalize_template(template, prospect)
     
     def send_email_sendgrid(self, to_email: str, subject: str, 
                           body: str, prospect_id: str) -> EmailResult:
@@ -145,7 +200,7 @@ class EmailAutomationAgent:
             
             response = self.sendgrid_client.send(message)
             
-            self.daily_sent += 1
+            self._count_sent()
             
             return EmailResult(
                 prospect_id=prospect_id,
@@ -164,6 +219,67 @@ class EmailAutomationAgent:
                 error=str(e)
             )
     
+    def send_batch_sendgrid_template(self, template_id: str, prospects: List[Dict],
+                                     delay_seconds: int = 0,
+                                     render_subject: Optional[Callable[[Dict], str]] = None,
+                                     render_body: Optional[Callable[[Dict], str]] = None) -> List[EmailResult]:
+        """Send to many prospects through a SendGrid dynamic template.
+        
+        Each prospect becomes one personalization carrying its template
+        variables (plus `subject`/`body` when renderers are given), so up to
+        1000 prospects share a single request. delay_seconds is kept by
+        staggering send_at.
+        """
+        from sendgrid.helpers.mail import Mail, Personalization, To
+        
+        results = []
+        start = int(time.time())
+        for offset in range(0, len(prospects), _SENDGRID_MAX_PERSONALIZATIONS):
+            chunk = prospects[offset:offset + _SENDGRID_MAX_PERSONALIZATIONS]
+            
+            message = Mail(from_email=self.sender_email)
+            message.template_id = template_id
+            for i, prospect in enumerate(chunk, offset):
+                personalization = Personalization()
+                personalization.add_to(To(prospect.get("email", "")))
+                data = {var: str(prospect.get(var, "")) for var in _TEMPLATE_VARS}
+                data["tracking_id"] = prospect.get("id", "")
+                if render_subject:
+                    data["subject"] = render_subject(prospect)
+                if render_body:
+                    data["body"] = render_body(prospect)
+                personalization.dynamic_template_data = data
+                if delay_seconds > 0 and i:
+                    personalization.send_at = start + i * delay_seconds
+                message.add_personalization(personalization)
+            
+            try:
+                response = self.sendgrid_client.send(message)
+                success = response.status_code == 202
+                message_id = response.headers.get('X-Message-Id')
+                error = None
+            except Exception as e:
+                logger.error(f"SendGrid error: {e}")
+                success, message_id, error = False, None, str(e)
+            
+            if success:
+                with self._count_lock:
+                    self.daily_sent += len(chunk)
+            sent_at = datetime.now() if success else None
+            results.extend(
+                EmailResult(
+                    prospect_id=prospect.get("id", ""),
+                    email=prospect.get("email", ""),
+                    success=success,
+                    message_id=message_id,
+                    error=error,
+                    sent_at=sent_at
+                )
+                for prospect in chunk
+            )
+        
+        return results
+    
     def send_email_ses(self, to_email: str, subject: str,
                       body: str, prospect_id: str) -> EmailResult:
         """Send email via AWS SES."""
@@ -187,7 +303,7 @@ class EmailAutomationAgent:
                 }
             )
             
-            self.daily_sent += 1
+            self._count_sent()
             
             return EmailResult(
                 prospect_id=prospect_id,
@@ -206,9 +322,11 @@ class EmailAutomationAgent:
                 error=str(e)
             )
     
-    def send_single_email(self, prospect: Dict, subject_template: str,
-                         body_template: str) -> EmailResult:
-        """Send a single personalized email."""
+    def send_single_email(self, prospect: Dict,
+                         subject_template: Union[str, Callable[[Dict], str]],
+                         body_template: Union[str, Callable[[Dict], str]]) -> EmailResult:
+        """Send a single personalized email. Templates may be raw strings or
+        renderers from _compile_template."""
         if not self._check_rate_limit():
             return EmailResult(
                 prospect_id=prospect.get("id", ""),
@@ -218,13 +336,11 @@ class EmailAutomationAgent:
             )
         
         # Personalize
-        subject = self.personalize_template(subject_template, prospect)
-        body = self.personalize_template(body_template, prospect)
+        subject = self._render(subject_template, prospect)
         
         # Add tracking pixel (optional)
         tracking_id = prospect.get("id", "")
-        tracking_pixel = f'<img src="https://tracker.example.com/pixel/{tracking_id}" width="1" height="1" />'
-        body += tracking_pixel
+        body = "".join((self._render(body_template, prospect), _PIXEL_FMT.format(tracking_id)))
         
         # Send via preferred method
         to_email = prospect.get("email", "")
@@ -237,7 +353,7 @@ class EmailAutomationAgent:
         else:
             # Simulation mode
             logger.info(f"[SIMULATION] Would send to {to_email}: {subject}")
-            self.daily_sent += 1
+            self._count_sent()
             return EmailResult(
                 prospect_id=prospect_id,
                 email=to_email,
@@ -247,34 +363,46 @@ class EmailAutomationAgent:
             )
     
     def send_campaign(self, campaign: EmailCampaign,
-                     delay_seconds: int = 30) -> List[EmailResult]:
-        """Send a campaign to multiple prospects with delays."""
-        results = []
+                     delay_seconds: int = 30, max_workers: int = 8) -> List[EmailResult]:
+        """Send a campaign to multiple prospects, starting at most one send every
+        delay_seconds while up to max_workers sends are in flight."""
+        # Every prospect shares the campaign templates, so parse them once
+        render_subject = _compile_template(campaign.subject_template)
+        render_body = _compile_template(campaign.body_template)
         
-        for prospect in campaign.prospects:
-            # Check rate limit
-            if not self._check_rate_limit():
-                logger.warning("Daily limit reached, stopping campaign")
-                break
-            
-            # Send email
-            result = self.send_single_email(
-                prospect,
-                campaign.subject_template,
-                campaign.body_template
+        # Only schedule what today's remaining quota allows
+        self._reset_daily_counter()
+        remaining = max(self.daily_limit - self.daily_sent, 0)
+        prospects = campaign.prospects[:remaining]
+        if len(prospects) < len(campaign.prospects):
+            logger.warning("Daily limit reached, stopping campaign")
+        
+        if self.sendgrid_client and campaign.sendgrid_template_id:
+            results = self.send_batch_sendgrid_template(
+                campaign.sendgrid_template_id, prospects, delay_seconds, render_subject, render_body
             )
-            results.append(result)
-            
-            if result.success:
-                logger.info(f"✅ Sent to {prospect.get('email')}")
-            else:
-                logger.error(f"❌ Failed to send to {prospect.get('email')}: {result.error}")
-            
-            # Rate limiting delay
-            if delay_seconds > 0:
-                time.sleep(delay_seconds)
+            logger.info(f"Queued {sum(r.success for r in results)}/{len(results)} emails via SendGrid template")
+            return results
         
-        return results
+        pacer = _RateLimiter(1, delay_seconds) if delay_seconds > 0 else None
+        
+        def send(prospect: Dict) -> EmailResult:
+            if pacer:
+                pacer.acquire()
+            return self.send_single_email(prospect, render_subject, render_body)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(send, prospect) for prospect in prospects]
+            prospect_by_future = dict(zip(futures, prospects))
+            for future in as_completed(futures):
+                result = future.result()
+                email = prospect_by_future[future].get('email')
+                if result.success:
+                    logger.info(f"✅ Sent to {email}")
+                else:
+                    logger.error(f"❌ Failed to send to {email}: {result.error}")
+        
+        return [future.result() for future in futures]
     
     def get_campaign_stats(self, results: List[EmailResult]) -> Dict:
         """Get statistics for a campaign."""
@@ -292,14 +420,12 @@ class EmailAutomationAgent:
     
     def validate_email_list(self, prospects: List[Dict]) -> List[Dict]:
         """Validate and clean email list."""
-        import re
-        
-        email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+        emails = [prospect.get("email", "") for prospect in prospects]
+        valid_emails = set(_EMAIL_RE.findall("\n".join(emails)))
         
         valid = []
-        for prospect in prospects:
-            email = prospect.get("email", "")
-            if email_pattern.match(email):
+        for prospect, email in zip(prospects, emails):
+            if email in valid_emails:
                 valid.append(prospect)
             else:
                 logger.warning(f"Invalid email: {email}")
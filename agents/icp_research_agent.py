@@ -2,19 +2,60 @@
 ICP Research Agent
 Identifies high-intent prospects across LinkedIn, Reddit, and public databases.
 """
-import json
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import List, Dict, Optional
-from dataclasses import dataclass, asdict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterator, List, Dict, Optional
+from dataclasses import dataclass
 from datetime import datetime
-import requests
+from functools import cached_property
+from pathlib import Path
+import httpx
+import orjson
 import re
-from bs4 import BeautifulSoup
+
+from utils.background_writer import write_in_background
+from utils.kimi_http import HTTP2_AVAILABLE, ResponseCache
 
 logger = logging.getLogger(__name__)
 
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16)
+
+# Priority-score signals, matched as substrings ("svp" counts as "vp")
+_DM_RE = re.compile(r'founder|vp|head|director|cto|ceo|cmo', re.I)
+_STAGE_RE = re.compile(r'series a|seed', re.I)
+
+
+# Generated profiles repeat a handful of titles and stages, so memoize the bonuses
+@functools.lru_cache(maxsize=1024)
+def _title_bonus(title: str) -> float:
+    return 1.5 if _DM_RE.search(title) else 0.0
+
+
+@functools.lru_cache(maxsize=1024)
+def _stage_bonus(company_stage: str) -> float:
+    return 0.5 if _STAGE_RE.search(company_stage) else 0.0
 
-@dataclass
+
+def _extract_json(text: str, open_char: str, close_char: str):
+    """Parse the span from the first open_char to the last close_char.
+    
+    Same span as a greedy DOTALL regex, found with two linear scans.
+    Returns None when the text has no such span.
+    """
+    start = text.find(open_char)
+    end = text.rfind(close_char)
+    if start == -1 or end < start:
+        return None
+    return orjson.loads(text[start:end + 1])
+
+
+@dataclass(slots=True)
 class Prospect:
     prospect_id: str
     name: str
@@ -34,6 +75,50 @@ class Prospect:
     status: str = "prospect"
 
 
+# Per niche: one case-insensitive scan for every pain keyword (the lookahead
+# tests each position, so overlapping keywords are all seen), then rules in
+# priority order naming the keyword groups each template needs, and a default.
+_TEMPLATE_RULES = {
+    "saas": (
+        re.compile(
+            r"(?=(?P<reporting>reporting|manual)|(?P<competitor>competitor|dashboard)"
+            r"|(?P<data>data)|(?P<overload>overwhelm|insight))",
+            re.I
+        ),
+        (
+            ({"reporting"}, "Template_1_Pain_Point"),
+            ({"competitor"}, "Template_2_Competitor_Reference"),
+            ({"data", "overload"}, "Template_3_Content_Hook"),
+        ),
+        "Template_4_ROI_Focused"
+    ),
+    "agency": (
+        re.compile(r"(?=(?P<onboarding>onboarding|reporting)|(?P<scale>scale|growth))", re.I),
+        (
+            ({"onboarding"}, "Template_1_Time_Savings"),
+            ({"scale"}, "Template_2_Scale_Constraint"),
+        ),
+        "Template_3_Competitive_Edge"
+    ),
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _keyword_matcher(keywords: tuple) -> tuple:
+    """Compile lowercased keywords into one scanning regex.
+    
+    The lookahead tries every position and takes the longest keyword starting
+    there; `implied` maps that keyword to every keyword it contains, so the
+    result equals testing each keyword as a substring.
+    """
+    lowered = sorted({kw.lower() for kw in keywords}, key=len, reverse=True)
+    if not lowered:
+        return re.compile(r"(?!)"), {}
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, lowered)) + "))")
+    implied = {kw: [other for other in lowered if other in kw] for kw in lowered}
+    return pattern, implied
+
+
 class ICPResearchAgent:
     """Agent for researching and identifying ideal customer profile prospects."""
     
@@ -41,39 +126,111 @@ class ICPResearchAgent:
         self.config = config
         self.moonshot_api_key = config.get("moonshot_api_key")
         self.moonshot_base_url = config.get("moonshot_base_url", "https://api.moonshot.cn/v1")
-        self.session = requests.Session()
-        
-    def _call_kimi(self, prompt: str, mode: str = "instant") -> str:
-        """Call Kimi K2.5 API."""
-        headers = {
+        self.session = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            headers=self._kimi_headers(),
+            timeout=60.0,
+            limits=_HTTP_LIMITS
+        )
+        # Cap on concurrent Kimi calls when research queries run in parallel
+        self.max_concurrency = config.get("icp_max_concurrency", 8)
+        # Completions for deterministic prompts (enrichment) are reused across runs
+        cache_dir = config.get("cache_dir", ".kimi_cache")
+        self.cache = ResponseCache(
+            Path(cache_dir) / "icp_responses.sqlite3",
+            ttl=config.get("icp_cache_ttl", 86400)
+        ) if cache_dir else None
+        # Reddit scans are kept on disk so the evening wrap-up (18:00, often a
+        # separate `main.py evening` process) reuses the 08:00 morning scan; the
+        # default TTL covers that 10h gap. Posts made in between are only picked
+        # up the next morning, which is the trade-off for one scan a day.
+        self.reddit_cache_ttl = config.get("reddit_cache_ttl", 11 * 3600)
+        self.reddit_cache_path = Path(config.get("reddit_cache_path", "data/reddit_cache.json"))
+        self._reddit_cache_lock = threading.Lock()
+        # prospect_ids already handed out, one per line; re-generated profiles are dropped
+        self.seen_path = Path(config.get("seen_prospects_path", "data/seen_prospects.txt"))
+        self._seen_lock = threading.Lock()
+    
+    def _kimi_headers(self) -> Dict:
+        return {
             "Authorization": f"Bearer {self.moonshot_api_key}",
             "Content-Type": "application/json"
         }
-        
-        payload = {
+    
+    def _kimi_payload(self, prompt: str, mode: str) -> Dict:
+        return {
             "model": self.config.get("moonshot_model", "kimi-k2.5"),
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.3 if mode == "instant" else 0.7,
             "max_tokens": 4000
         }
         
+    def _call_kimi(self, prompt: str, mode: str = "instant", cacheable: bool = False) -> str:
+        """Call Kimi K2.5 API.
+        
+        Pass cacheable=True only for prompts whose answer may be reused across
+        runs (e.g. enrichment); generation prompts repeat daily and must not be.
+        """
+        payload = self._kimi_payload(prompt, mode)
+        if cacheable and self.cache:
+            key = ResponseCache.key_for(payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
         try:
             response = self.session.post(
                 f"{self.moonshot_base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
+                json=payload
             )
             response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+            content = response.json()["choices"][0]["message"]["content"]
         except Exception as e:
             logger.error(f"Kimi API error: {e}")
             return ""
+        
+        if cacheable and self.cache and content:
+            self.cache.set(key, content)
+        return content
+    
+    async def _call_kimi_async(self, client: httpx.AsyncClient, sem: asyncio.Semaphore,
+                               prompt: str, mode: str = "instant", cacheable: bool = False) -> str:
+        """Async Kimi call; like _call_kimi, returns "" on failure."""
+        payload = self._kimi_payload(prompt, mode)
+        if cacheable and self.cache:
+            key = ResponseCache.key_for(payload)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        async with sem:
+            try:
+                response = await client.post(
+                    f"{self.moonshot_base_url}/chat/completions",
+                    json=payload
+                )
+                response.raise_for_status()
+                content = response.json()["choices"][0]["message"]["content"]
+            except Exception as e:
+                logger.error(f"Kimi API error: {e}")
+                return ""
+        
+        if cacheable and self.cache and content:
+            self.cache.set(key, content)
+        return content
+    
+    def _async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers=self._kimi_headers(),
+            timeout=60.0,
+            limits=_HTTP_LIMITS
+        )
     
     def _generate_prospect_id(self, name: str, company: str) -> str:
         """Generate unique prospect ID."""
-        import hashlib
-        return hashlib.md5(f"{name}-{company}".encode()).hexdigest()[:12]
+        # NUL separator: ("a-b", "c") and ("a", "b-c") no longer collide
+        return hashlib.blake2b(f"{name}\x00{company}".encode(), digest_size=6).hexdigest()
     
     def _calculate_priority_score(self, pain_signals: List[str], title: str, company_stage: str) -> float:
         """Calculate priority score 0-10 based on ICP criteria."""
@@ -83,48 +240,34 @@ class ICPResearchAgent:
         score += len(pain_signals) * 0.8
         
         # Decision maker titles get priority
-        decision_maker_keywords = ["founder", "vp", "head", "director", "cto", "ceo", "cmo"]
-        if any(kw in title.lower() for kw in decision_maker_keywords):
-            score += 1.5
+        score += _title_bonus(title)
         
         # Company stage scoring
-        if "series a" in company_stage.lower() or "seed" in company_stage.lower():
-            score += 0.5
+        score += _stage_bonus(company_stage)
         
         return min(round(score, 1), 10.0)
     
     def _select_template(self, pain_signals: List[str], niche: str) -> str:
         """Select best outreach template based on signals."""
-        pain_text = " ".join(pain_signals).lower()
-        
-        if niche == "saas":
-            if "reporting" in pain_text or "manual" in pain_text:
-                return "Template_1_Pain_Point"
-            elif "competitor" in pain_text or "dashboard" in pain_text:
-                return "Template_2_Competitor_Reference"
-            elif "data" in pain_text and ("overwhelm" in pain_text or "insight" in pain_text):
-                return "Template_3_Content_Hook"
-            else:
-                return "Template_4_ROI_Focused"
-        else:  # agency
-            if "onboarding" in pain_text or "reporting" in pain_text:
-                return "Template_1_Time_Savings"
-            elif "scale" in pain_text or "growth" in pain_text:
-                return "Template_2_Scale_Constraint"
-            else:
-                return "Template_3_Competitive_Edge"
+        pattern, rules, default = _TEMPLATE_RULES["saas" if niche == "saas" else "agency"]
+        found = {m.lastgroup for m in pattern.finditer(" ".join(pain_signals))}
+        for required, template in rules:
+            if found.issuperset(required):
+                return template
+        return default
     
-    def research_linkedin_prospects(self, search_queries: List[str], niche: str, count: int = 25) -> List[Prospect]:
-        """Research prospects from LinkedIn search queries."""
-        prospects = []
-        
-        # This is a simplified implementation
-        # In production, you'd integrate with LinkedIn Sales Navigator API
-        # or use Phantombuster + proxy rotation
-        
-        for query in search_queries:
-            prompt = f"""Given the LinkedIn search query "{query}" for {niche} prospects, 
-            generate {count // len(search_queries)} realistic prospect profiles that match the ICP.
+    def _score_batch(self, rows: List[Dict], niche: str) -> Iterator[tuple]:
+        """Yield (priority_score, template) for each parsed row, in order."""
+        for p in rows:
+            pain_signals = p["pain_signals"]
+            yield (
+                self._calculate_priority_score(pain_signals, p["title"], p["company_stage"]),
+                self._select_template(pain_signals, niche)
+            )
+    
+    def _linkedin_prompt(self, query: str, niche: str, per_query: int) -> str:
+        return f"""Given the LinkedIn search query "{query}" for {niche} prospects, 
+            generate {per_query} realistic prospect profiles that match the ICP.
             
             Return JSON array with objects containing:
             - name
@@ -138,70 +281,198 @@ class ICPResearchAgent:
             - personalization_data (object with recent milestone, funding info, etc.)
             
             Make data realistic and specific to the {niche} niche."""
-            
-            response = self._call_kimi(prompt, mode="instant")
-            
-            try:
-                # Extract JSON from response
-                json_match = re.search(r'\[.*\]', response, re.DOTALL)
-                if json_match:
-                    data = json.loads(json_match.group())
-                    for p in data:
-                        prospect = Prospect(
-                            prospect_id=self._generate_prospect_id(p["name"], p["company"]),
-                            name=p["name"],
-                            title=p["title"],
-                            company=p["company"],
-                            company_stage=p["company_stage"],
-                            arr_estimate=p["arr_estimate"],
-                            pain_signals=p["pain_signals"],
-                            email=p.get("email", ""),
-                            linkedin_url=p["linkedin_url"],
-                            niche=niche,
-                            priority_score=self._calculate_priority_score(p["pain_signals"], p["title"], p["company_stage"]),
-                            recommended_template=self._select_template(p["pain_signals"], niche),
-                            personalization_data=p.get("personalization_data", {}),
-                            source="linkedin_research",
-                            discovered_at=datetime.now().isoformat()
-                        )
-                        prospects.append(prospect)
-            except Exception as e:
-                logger.error(f"Error parsing LinkedIn prospects: {e}")
-        
+    
+    def _parse_linkedin_response(self, response: str, niche: str, discovered_at: str) -> List[Prospect]:
+        prospects = []
+        try:
+            # Extract JSON from response
+            data = _extract_json(response, "[", "]")
+            if data is not None:
+                for p, (score, template) in zip(data, self._score_batch(data, niche)):
+                    prospect = Prospect(
+                        prospect_id=self._generate_prospect_id(p["name"], p["company"]),
+                        name=p["name"],
+                        title=p["title"],
+                        company=p["company"],
+                        company_stage=p["company_stage"],
+                        arr_estimate=p["arr_estimate"],
+                        pain_signals=p["pain_signals"],
+                        email=p.get("email", ""),
+                        linkedin_url=p["linkedin_url"],
+                        niche=niche,
+                        priority_score=score,
+                        recommended_template=template,
+                        personalization_data=p.get("personalization_data", {}),
+                        source="linkedin_research",
+                        discovered_at=discovered_at
+                    )
+                    prospects.append(prospect)
+        except Exception as e:
+            logger.error(f"Error parsing LinkedIn prospects: {e}")
         return prospects
     
-    def monitor_reddit(self, subreddits: List[str], keywords: List[str]) -> List[Dict]:
-        """Monitor Reddit for prospect signals."""
+    async def research_linkedin_prospects_async(self, search_queries: List[str], niche: str,
+                                                count: int = 25,
+                                                client: Optional[httpx.AsyncClient] = None) -> List[Prospect]:
+        """Research prospects from LinkedIn search queries, one concurrent Kimi call per query.
+        
+        Prospects already returned by an earlier call (persisted seen-set) are dropped.
+        """
+        # This is a simplified implementation
+        # In production, you'd integrate with LinkedIn Sales Navigator API
+        # or use Phantombuster + proxy rotation
+        if client is None:
+            async with self._async_client() as own_client:
+                return await self.research_linkedin_prospects_async(search_queries, niche, count, own_client)
+        
+        sem = asyncio.Semaphore(self.max_concurrency)
+        per_query = count // len(search_queries)
+        responses = await asyncio.gather(*(
+            self._call_kimi_async(client, sem, self._linkedin_prompt(query, niche, per_query), mode="instant")
+            for query in search_queries
+        ))
+        
+        # Every prospect in a batch shares one discovery timestamp
+        now_iso = datetime.now().isoformat()
+        prospects = []
+        for response in responses:
+            prospects.extend(self._parse_linkedin_response(response, niche, now_iso))
+        return self._filter_unseen(prospects)
+    
+    def research_linkedin_prospects(self, search_queries: List[str], niche: str, count: int = 25) -> List[Prospect]:
+        """Research prospects from LinkedIn search queries."""
+        return asyncio.run(self.research_linkedin_prospects_async(search_queries, niche, count))
+    
+    @cached_property
+    def _reddit(self):
+        """PRAW client, built on first use and reused so its HTTP session
+        (and TLS connections) survive between monitor_reddit calls."""
         import praw
         
-        reddit = praw.Reddit(
+        return praw.Reddit(
             client_id=self.config.get("reddit_client_id"),
             client_secret=self.config.get("reddit_client_secret"),
             user_agent=self.config.get("reddit_user_agent", "KimiAgent/1.0")
         )
+    
+    def monitor_reddit(self, subreddits: List[str], keywords: List[str]) -> List[Dict]:
+        """Monitor Reddit for prospect signals.
         
+        A fresh scan of the same subreddits with a superset of the keywords
+        (e.g. the morning research batch) is filtered instead of re-fetched.
+        """
+        subs_key = tuple(sorted(subreddits))
+        wanted = {kw.lower() for kw in keywords}
+        cached = self._cached_reddit_scan(subs_key, wanted)
+        if cached is not None:
+            order = {name: i for i, name in enumerate(subreddits)}
+            opportunities = []
+            for opp in sorted(cached, key=lambda o: order[o["subreddit"]]):
+                found = {kw.lower() for kw in opp["keywords_found"]} & wanted
+                if found:
+                    opportunities.append({**opp, "keywords_found": [kw for kw in keywords if kw.lower() in found]})
+            logger.info(f"Reddit scan served from cache: {len(opportunities)} opportunities")
+            return opportunities
+        
+        reddit = self._reddit
+        
+        # Each subreddit listing is a blocking HTTPS call, so fetch them concurrently
+        scan = functools.partial(self._scan_subreddit, reddit, keywords=keywords)
+        with ThreadPoolExecutor(max_workers=min(8, max(len(subreddits), 1))) as executor:
+            opportunities = list(chain.from_iterable(executor.map(scan, subreddits)))
+        
+        with self._reddit_cache_lock:
+            self._reddit_cache[(subs_key, tuple(sorted(wanted)))] = (
+                time.time() + self.reddit_cache_ttl, opportunities
+            )
+            payload = orjson.dumps([
+                {"subreddits": key[0], "keywords": key[1], "expires_at": expires, "opportunities": opps}
+                for key, (expires, opps) in self._reddit_cache.items()
+            ])
+        self.reddit_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_in_background(self.reddit_cache_path, payload, f"Saved Reddit scan to {self.reddit_cache_path}")
+        return opportunities
+    
+    @cached_property
+    def _reddit_cache(self) -> Dict[tuple, tuple]:
+        """Reddit scans keyed by (subreddits, keywords): (expires_at epoch, opportunities)."""
+        if not self.reddit_cache_path.exists():
+            return {}
+        try:
+            entries = orjson.loads(self.reddit_cache_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable Reddit cache {self.reddit_cache_path}: {e}")
+            return {}
+        return {
+            (tuple(e["subreddits"]), tuple(e["keywords"])): (e["expires_at"], e["opportunities"])
+            for e in entries
+        }
+    
+    def _cached_reddit_scan(self, subs_key: tuple, wanted: set) -> Optional[List[Dict]]:
+        """Fresh cached opportunities for these subreddits covering every wanted keyword."""
+        now = time.time()
+        with self._reddit_cache_lock:
+            for key, (expires, opportunities) in list(self._reddit_cache.items()):
+                if expires <= now:
+                    del self._reddit_cache[key]
+                elif key[0] == subs_key and wanted.issubset(key[1]):
+                    return opportunities
+        return None
+    
+    def _scan_subreddit(self, reddit, subreddit_name: str, keywords: List[str]) -> List[Dict]:
+        """Collect keyword-matching posts from one subreddit's newest 50."""
         opportunities = []
+        pattern, implied = _keyword_matcher(tuple(keywords))
         
-        for subreddit_name in subreddits:
-            try:
-                subreddit = reddit.subreddit(subreddit_name)
-                for post in subreddit.new(limit=50):
-                    post_text = f"{post.title} {post.selftext}".lower()
-                    if any(kw.lower() in post_text for kw in keywords):
-                        opportunities.append({
-                            "type": "reddit_post",
-                            "subreddit": subreddit_name,
-                            "title": post.title,
-                            "url": f"https://reddit.com{post.permalink}",
-                            "author": str(post.author),
-                            "created_utc": post.created_utc,
-                            "keywords_found": [kw for kw in keywords if kw.lower() in post_text]
-                        })
-            except Exception as e:
-                logger.error(f"Reddit monitoring error for r/{subreddit_name}: {e}")
+        try:
+            subreddit = reddit.subreddit(subreddit_name)
+            for post in subreddit.new(limit=50):
+                post_text = f"{post.title} {post.selftext}".lower()
+                found = set()
+                for longest in set(pattern.findall(post_text)):
+                    found.update(implied[longest])
+                if found:
+                    opportunities.append({
+                        "type": "reddit_post",
+                        "subreddit": subreddit_name,
+                        "title": post.title,
+                        "url": f"https://reddit.com{post.permalink}",
+                        "author": str(post.author),
+                        "created_utc": post.created_utc,
+                        "keywords_found": [kw for kw in keywords if kw.lower() in found]
+                    })
+        except Exception as e:
+            logger.error(f"Reddit monitoring error for r/{subreddit_name}: {e}")
         
         return opportunities
     
+    @cached_property
+    def _seen(self) -> set:
+        """prospect_ids from earlier batches, loaded on first dedup."""
+        try:
+            return set(self.seen_path.read_text().split())
+        except FileNotFoundError:
+            return set()
+    
+    def _filter_unseen(self, prospects: List[Prospect]) -> List[Prospect]:
+        """Drop prospects whose ID was already returned, here or in an earlier run,
+        and record the new IDs so tomorrow's batch skips them too."""
+        with self._seen_lock:
+            seen = self._seen
+            fresh = []
+            for prospect in prospects:
+                if prospect.prospect_id in seen:
+                    continue
+                seen.add(prospect.prospect_id)
+                fresh.append(prospect)
+            if fresh:
+                self.seen_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.seen_path, 'a') as f:
+                    f.write("".join(f"{p.prospect_id}\n" for p in fresh))
+        if len(fresh) < len(prospects):
+            logger.info(f"Skipped {len(prospects) - len(fresh)} previously seen prospects")
+        return fresh
+    
     def enrich_prospect(self, prospect: Prospect) -> Prospect:
         """Enrich prospect data with additional research."""
         prompt = f"""Enrich this prospect data with additional research:
@@ -218,12 +489,11 @@ class ICPResearchAgent:
         
         Return as JSON with keys: recent_news, tech_stack, authority_signals, email_guess"""
         
-        response = self._call_kimi(prompt, mode="instant")
+        response = self._call_kimi(prompt, mode="instant", cacheable=True)
         
         try:
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                enrichment = json.loads(json_match.group())
+            enrichment = _extract_json(response, "{", "}")
+            if enrichment is not None:
                 prospect.personalization_data.update(enrichment)
         except Exception as e:
             logger.error(f"Enrichment error: {e}")
@@ -232,8 +502,10 @@ class ICPResearchAgent:
     
     def research_daily_batch(self, saas_count: int = 35, agency_count: int = 15) -> List[Prospect]:
         """Research daily batch of prospects (35 SaaS + 15 Agency = 50 total)."""
-        all_prospects = []
-        
+        return asyncio.run(self.research_daily_batch_async(saas_count, agency_count))
+    
+    async def research_daily_batch_async(self, saas_count: int = 35, agency_count: int = 15) -> List[Prospect]:
+        """Run SaaS and agency research and the Reddit scan concurrently."""
         # SaaS queries
         saas_queries = [
             "VP Product SaaS seed funded",
@@ -241,8 +513,6 @@ class ICPResearchAgent:
             "Head of Growth startup metrics",
             "CTO SaaS dashboard reporting"
         ]
-        saas_prospects = self.research_linkedin_prospects(saas_queries, "saas", saas_count)
-        all_prospects.extend(saas_prospects)
         
         # Agency queries  
         agency_queries = [
@@ -250,25 +520,29 @@ class ICPResearchAgent:
             "digital agency operations director",
             "PPC agency founder automation"
         ]
-        agency_prospects = self.research_linkedin_prospects(agency_queries, "agency", agency_count)
-        all_prospects.extend(agency_prospects)
         
-        # Monitor Reddit for both niches
-        reddit_opps = self.monitor_reddit(
-            ["SaaS", "startups", "marketing"],
-            ["analytics", "dashboard", "reporting", "automation", "manual work"]
-        )
+        async with self._async_client() as client:
+            saas_prospects, agency_prospects, reddit_opps = await asyncio.gather(
+                self.research_linkedin_prospects_async(saas_queries, "saas", saas_count, client),
+                self.research_linkedin_prospects_async(agency_queries, "agency", agency_count, client),
+                # Monitor Reddit for both niches (blocking PRAW calls run off-loop)
+                asyncio.to_thread(
+                    self.monitor_reddit,
+                    ["SaaS", "startups", "marketing"],
+                    ["analytics", "dashboard", "reporting", "automation", "manual work"]
+                )
+            )
+        all_prospects = saas_prospects + agency_prospects
         
         logger.info(f"Research complete: {len(all_prospects)} prospects, {len(reddit_opps)} Reddit opportunities")
         
         return all_prospects
     
     def export_to_json(self, prospects: List[Prospect], filepath: str):
-        """Export prospects to JSON file."""
-        data = [asdict(p) for p in prospects]
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
-        logger.info(f"Exported {len(prospects)} prospects to {filepath}")
+        """Export prospects to JSON file; the write finishes in the background."""
+        # orjson serializes the dataclasses directly, no asdict() deep copy
+        payload = orjson.dumps(prospects, option=orjson.OPT_INDENT_2)
+        write_in_background(filepath, payload, f"Exported {len(prospects)} prospects to {filepath}")
 
 
 if __name__ == "__main__":
@@ -2,20 +2,33 @@
 Agent Orchestrator
 Coordinates all 5 agents in daily workflows (morning, midday, evening).
 """
+import functools
 import json
 import logging
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Optional
+from dataclasses import fields
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import orjson
+
 from agents.icp_research_agent import ICPResearchAgent
 from agents.copy_generation_agent import CopyGenerationAgent
 from agents.outreach_execution_agent import OutreachExecutionAgent
 from agents.crm_pipeline_agent import CRMPipelineAgent
 from agents.performance_optimization_agent import PerformanceOptimizationAgent
+from utils.background_writer import write_in_background
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=4)
+def _read_templates(filepath: str, mtime_ns: int, size: int) -> Dict:
+    """Parse a template file; the stat fields in the key drop stale entries."""
+    with open(filepath, 'rb') as f:
+        return orjson.loads(f.read())
+
 
 class AgentOrchestrator:
     """Orchestrates the 5-agent swarm for daily operations."""
@@ -38,12 +51,18 @@ class AgentOrchestrator:
         
         self.report_path = Path("data/daily_reports")
         self.report_path.mkdir(parents=True, exist_ok=True)
+        
+        # (expires_at, crm revision, crm fields) for get_dashboard polling
+        self.dashboard_ttl = self.config.get("dashboard_ttl", 5.0)
+        self._dashboard_cache: Optional[tuple] = None
     
     def _load_external_templates(self, filepath: str) -> Dict:
         """Load templates from external file."""
         try:
-            with open(filepath, 'r') as f:
-                return json.load(f)
+            # Re-instantiated orchestrators (tests, workers) share the parsed dict;
+            # it is read-only, CopyGenerationAgent only looks templates up
+            st = os.stat(filepath)
+            return _read_templates(filepath, st.st_mtime_ns, st.st_size)
         except Exception as e:
             logger.error(f"Error loading templates from {filepath}: {e}")
             return {}
@@ -74,7 +93,11 @@ class AgentOrchestrator:
         
         # Add to CRM
         if prospects:
-            self.crm_agent.add_prospects_batch([p.__dict__ for p in prospects])
+            # Prospect is slotted (no __dict__); a shallow field copy is all the CRM needs
+            prospect_fields = [f.name for f in fields(prospects[0])]
+            self.crm_agent.add_prospects_batch([
+                {name: getattr(p, name) for name in prospect_fields} for p in prospects
+            ])
         
         results["new_prospects"] = len(prospects)
         logger.info(f"[ICP Agent] Found {len(prospects)} prospects")
@@ -83,21 +106,21 @@ class AgentOrchestrator:
         logger.info("[Copy Agent] Generating messages...")
         
         # Get prospects ready for outreach (not yet contacted)
-        ready_prospects = [
-            p for p in self.crm_agent.prospects.values()
-            if p.get("stage") == "prospect" and p.get("priority_score", 0) >= 7.0
-        ][:self.config.get("daily_limits", {}).get("connections", 20)]
+        ready_prospects = self.crm_agent.get_ready_for_outreach(
+            self.config.get("daily_limits", {}).get("connections", 20)
+        )
         
         if ready_prospects:
             messages = self.copy_agent.generate_batch(ready_prospects)
             
             # Schedule connection requests for high-quality messages
+            scheduled_at = datetime.now()
             for msg in messages:
                 if msg.quality_score >= self.config.get("quality_threshold", 7.0):
                     prospect = self.crm_agent.prospects.get(msg.prospect_id)
                     if prospect:
                         self.outreach_agent.schedule_connection_request(
-                            prospect, msg.body
+                            prospect, msg.body, now=scheduled_at
                         )
             
             results["messages_ready"] = len(messages)
@@ -145,7 +168,7 @@ class AgentOrchestrator:
         
         # 1. Outreach Agent: Send scheduled actions
         logger.info("[Outreach Agent] Sending scheduled actions...")
-        executed = self.outreach_agent.execute_scheduled_actions()
+        executed = self.outreach_agent.drain_due_actions()
         results["actions_executed"] = len(executed)
         
         for action in executed:
@@ -188,7 +211,7 @@ class AgentOrchestrator:
         
         # 1. Outreach Agent: Final daily batch
         logger.info("[Outreach Agent] Final batch...")
-        final_actions = self.outreach_agent.execute_scheduled_actions()
+        final_actions = self.outreach_agent.drain_due_actions()
         results["final_actions"] = len(final_actions)
         
         # 2. CRM Agent: Update pipeline stages
@@ -229,20 +252,19 @@ class AgentOrchestrator:
     
     def _save_daily_report(self, data: Dict):
         """Save daily report to file."""
-        date_str = datetime.now().strftime("%Y-%m-%d")
+        now = datetime.now()
+        date_str = now.strftime("%Y-%m-%d")
         filepath = self.report_path / f"report_{date_str}.json"
         
         report = {
             "date": date_str,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": now.isoformat(),
             "data": data,
             "pipeline": self.crm_agent.get_pipeline_summary()
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(report, f, indent=2)
-        
-        logger.info(f"Daily report saved to {filepath}")
+        payload = orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        write_in_background(filepath, payload, f"Daily report saved to {filepath}")
     
     def weekly_review(self) -> Dict:
         """
@@ -282,12 +304,26 @@ class AgentOrchestrator:
         }
     
     def get_dashboard(self) -> Dict:
-        """Get current system dashboard."""
+        """Get current system dashboard; the CRM fields are reused for
+        dashboard_ttl seconds unless the CRM changes in between."""
+        now = time.monotonic()
+        revision = self.crm_agent.revision
+        cached = self._dashboard_cache
+        if cached and cached[0] > now and cached[1] == revision:
+            crm_fields = cached[2]
+        else:
+            crm_fields = {
+                "pipeline": self.crm_agent.get_pipeline_summary(),
+                "today_tasks": len(self.crm_agent.get_daily_tasks())
+            }
+            self._dashboard_cache = (now + self.dashboard_ttl, revision, crm_fields)
+        
+        # Outreach counters are cheap and change outside the CRM, so read them live
         return {
             "timestamp": datetime.now().isoformat(),
             "daily_limits": self.outreach_agent.get_daily_stats(),
-            "pipeline": self.crm_agent.get_pipeline_summary(),
-            "today_tasks": len(self.crm_agent.get_daily_tasks()),
+            "pipeline": crm_fields["pipeline"],
+            "today_tasks": crm_fields["today_tasks"],
             "queue_length": len(self.outreach_agent.action_queue)
         }
 
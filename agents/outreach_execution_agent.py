@@ -2,9 +2,13 @@
 Outreach Execution Agent
 Automates connection requests, DM sends, follow-ups, and multi-channel sequencing.
 """
+import heapq
+import itertools
 import json
 import logging
 import random
+import re
+import threading
 import time
 from typing import List, Dict, Optional
 from dataclasses import dataclass
@@ -13,6 +17,12 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Reply sentiment cues, matched as substrings of the lowercased reply
+_POSITIVE_INDICATORS = ("interested", "yes", "sure", "book", "schedule", "call", "chat", "tell me more")
+_NEGATIVE_INDICATORS = ("no", "not interested", "unsubscribe", "stop", "remove")
+_POSITIVE_REPLY_RE = re.compile("|".join(map(re.escape, _POSITIVE_INDICATORS)))
+_NEGATIVE_REPLY_RE = re.compile("|".join(map(re.escape, _NEGATIVE_INDICATORS)))
+
 
 class OutreachStatus(Enum):
     CONNECTION_SENT = "connection_sent"
@@ -27,14 +37,30 @@ class OutreachStatus(Enum):
     DISCOVERY_BOOKED = "discovery_booked"
 
 
-@dataclass
+class ActionStatus(str, Enum):
+    """Lifecycle of a queued action; members compare equal to their strings."""
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+# Channel and action-type values shared by every OutreachAction
+CHANNEL_LINKEDIN = "LinkedIn"
+CHANNEL_EMAIL = "Email"
+ACTION_CONNECTION_REQUEST = "connection_request"
+ACTION_DM = "dm"
+ACTION_FOLLOWUP = "followup"
+ACTION_EMAIL = "email"
+
+
+@dataclass(slots=True)
 class OutreachAction:
     prospect_id: str
     action_type: str
     channel: str
     content: str
     scheduled_time: datetime
-    status: str = "pending"
+    status: ActionStatus = ActionStatus.PENDING
     executed_at: Optional[datetime] = None
     response: Optional[str] = None
 
@@ -42,6 +68,9 @@ class OutreachAction:
 class OutreachExecutionAgent:
     """Agent for executing outreach safely across channels."""
     
+    # Random gap (seconds) enforced between two sends on the same channel
+    ACTION_SPACING_SECONDS = (5, 15)
+    
     def __init__(self, config: Dict, crm_agent=None):
         self.config = config
         self.crm_agent = crm_agent
@@ -49,6 +78,7 @@ class OutreachExecutionAgent:
         self.weekly_connections = 0
         self.daily_messages = 0
         self.last_reset = datetime.now()
+        self._last_reset_monotonic = time.monotonic()
         
         # Safety limits
         self.max_daily_connections = config.get("daily_limits", {}).get("connections", 20)
@@ -57,48 +87,92 @@ class OutreachExecutionAgent:
         self.min_delay = config.get("safety", {}).get("min_delay_seconds", 300)
         self.max_delay = config.get("safety", {}).get("max_delay_seconds", 900)
         
-        # Queue for scheduled actions
-        self.action_queue: List[OutreachAction] = []
+        # Set once a limit is hit so bulk scheduling short-circuits; cleared on reset
+        self._conn_exhausted = False
+        self._msg_exhausted = False
+        self._update_exhausted()
+        
+        # Min-heap of (scheduled_time, seq, action); seq keeps FIFO order on ties
+        self.action_queue: List[tuple] = []
+        self._queue_seq = itertools.count()
         
-    def _check_and_reset_limits(self):
-        """Check if daily/weekly limits need reset."""
-        now = datetime.now()
+        # run_forever sleeps on _wake until the next action is due; an enqueue
+        # that becomes the new earliest action sets it to cut the sleep short
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Earliest time the next action may go out on each channel
+        self._next_slot_per_channel: Dict[str, datetime] = {}
+        # Other threads enqueue while run_forever executes; guards the heap
+        # and the channel slots
+        self._queue_lock = threading.Lock()
+        
+    def _check_and_reset_limits(self, now: Optional[datetime] = None):
+        """Check if daily/weekly limits need reset; `now` is the caller's clock snapshot."""
+        # Monotonic elapsed check; the wall clock is only read on an actual reset
+        if time.monotonic() - self._last_reset_monotonic < 86400:
+            return
         
         # Reset daily counter
-        if (now - self.last_reset).days >= 1:
-            self.daily_connections = 0
-            self.daily_messages = 0
-            self.last_reset = now
-            logger.info("Daily outreach limits reset")
+        self.daily_connections = 0
+        self.daily_messages = 0
+        self.last_reset = now or datetime.now()
+        self._last_reset_monotonic = time.monotonic()
+        self._update_exhausted()
+        logger.info("Daily outreach limits reset")
+    
+    def _update_exhausted(self):
+        """Recompute the limit-hit flags from the counters."""
+        self._conn_exhausted = (self.daily_connections >= self.max_daily_connections or
+                                self.weekly_connections >= self.max_weekly_connections)
+        self._msg_exhausted = self.daily_messages >= self.max_daily_messages
+    
+    def _queue_action(self, action: OutreachAction):
+        entry = (action.scheduled_time, next(self._queue_seq), action)
+        with self._queue_lock:
+            heapq.heappush(self.action_queue, entry)
+            is_next = self.action_queue[0] is entry
+        if is_next:
+            self._wake.set()
+    
+    def next_due_delay(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the earliest queued action is due (0 if overdue), None if empty."""
+        with self._queue_lock:
+            if not self.action_queue:
+                return None
+            due = self.action_queue[0][0]
+        delay = (due - (now or datetime.now())).total_seconds()
+        return max(delay, 0.0)
     
     def _calculate_delay(self) -> int:
         """Calculate random delay between actions."""
         return random.randint(self.min_delay, self.max_delay)
     
-    def _can_send_connection(self) -> bool:
+    def _can_send_connection(self, now: Optional[datetime] = None) -> bool:
         """Check if connection request can be sent safely."""
-        self._check_and_reset_limits()
-        return (self.daily_connections < self.max_daily_connections and 
-                self.weekly_connections < self.max_weekly_connections)
+        self._check_and_reset_limits(now)
+        return not self._conn_exhausted
     
-    def _can_send_message(self) -> bool:
+    def _can_send_message(self, now: Optional[datetime] = None) -> bool:
         """Check if DM can be sent safely."""
-        self._check_and_reset_limits()
-        return self.daily_messages < self.max_daily_messages
+        self._check_and_reset_limits(now)
+        return not self._msg_exhausted
     
-    def schedule_connection_request(self, prospect: Dict, message: str) -> Optional[OutreachAction]:
-        """Schedule a connection request with safety delays."""
-        if not self._can_send_connection():
+    def schedule_connection_request(self, prospect: Dict, message: str,
+                                    now: Optional[datetime] = None) -> Optional[OutreachAction]:
+        """Schedule a connection request with safety delays.
+        Batch callers can pass one shared `now` clock snapshot."""
+        if not self._can_send_connection(now):
             logger.warning(f"Connection limit reached for {prospect.get('name')}")
             return None
         
         # Calculate optimal send time (spread throughout day)
         # Slots: 9am, 12pm, 3pm, 6pm
         slots = [9, 12, 15, 18]
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        now = now or datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
         # Find next available slot
-        current_hour = datetime.now().hour
+        current_hour = now.hour
         available_slots = [s for s in slots if s > current_hour]
         
         if not available_slots:
@@ -112,75 +186,135 @@ class OutreachExecutionAgent:
         
         action = OutreachAction(
             prospect_id=prospect.get("prospect_id"),
-            action_type="connection_request",
-            channel="LinkedIn",
+            action_type=ACTION_CONNECTION_REQUEST,
+            channel=CHANNEL_LINKEDIN,
             content=message,
             scheduled_time=send_time
         )
         
-        self.action_queue.append(action)
+        self._queue_action(action)
         self.daily_connections += 1
         self.weekly_connections += 1
+        self._update_exhausted()
         
         logger.info(f"Scheduled connection request to {prospect.get('name')} at {send_time}")
         return action
     
-    def schedule_dm(self, prospect: Dict, message: str, delay_hours: int = 0) -> OutreachAction:
+    def schedule_dm(self, prospect: Dict, message: str, delay_hours: int = 0,
+                    now: Optional[datetime] = None) -> OutreachAction:
         """Schedule a DM to be sent."""
-        if not self._can_send_message():
+        now = now or datetime.now()
+        if not self._can_send_message(now):
             logger.warning(f"DM limit reached for {prospect.get('name')}")
             return None
         
-        send_time = datetime.now() + timedelta(hours=delay_hours, minutes=random.randint(0, 30))
+        send_time = now + timedelta(hours=delay_hours, minutes=random.randint(0, 30))
         
         action = OutreachAction(
             prospect_id=prospect.get("prospect_id"),
-            action_type="dm",
-            channel="LinkedIn",
+            action_type=ACTION_DM,
+            channel=CHANNEL_LINKEDIN,
             content=message,
             scheduled_time=send_time
         )
         
-        self.action_queue.append(action)
+        self._queue_action(action)
         self.daily_messages += 1
+        self._update_exhausted()
         
         logger.info(f"Scheduled DM to {prospect.get('name')} at {send_time}")
         return action
     
-    def execute_scheduled_actions(self) -> List[Dict]:
-        """Execute actions that are due."""
-        now = datetime.now()
+    def execute_scheduled_actions(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Execute actions that are due as of `now` (default: the current time)."""
+        now = now or datetime.now()
         executed = []
         
-        for action in self.action_queue[:]:
-            if action.scheduled_time <= now and action.status == "pending":
-                result = self._execute_action(action)
-                if result:
-                    executed.append(result)
-                self.action_queue.remove(action)
+        # Due actions come off the heap earliest first; the rest stay untouched.
+        # The lock is released while sending, since sends may enqueue follow-ups.
+        while True:
+            with self._queue_lock:
+                if not self.action_queue or self.action_queue[0][0] > now:
+                    break
+                _, _, action = heapq.heappop(self.action_queue)
+                if action.status != ActionStatus.PENDING:
+                    continue
+                
+                # Too soon after the last send on this channel: move the action to
+                # the channel's next slot instead of sleeping here
+                slot = self._next_slot_per_channel.get(action.channel)
+                if slot is not None and slot > now:
+                    action.scheduled_time = slot
+                    heapq.heappush(self.action_queue, (slot, next(self._queue_seq), action))
+                    continue
                 
-                # Add delay between executions
-                time.sleep(random.randint(5, 15))
+                self._next_slot_per_channel[action.channel] = now + timedelta(
+                    seconds=random.randint(*self.ACTION_SPACING_SECONDS)
+                )
+            
+            result = self._execute_action(action)
+            if result:
+                executed.append(result)
         
         return executed
     
+    def drain_due_actions(self) -> List[Dict]:
+        """Execute everything due now, waiting out per-channel spacing.
+        
+        For one-shot callers without a run_forever loop: blocks only while the
+        next queued action is within one spacing gap, so deferred actions go
+        out before returning and later-scheduled ones stay queued.
+        """
+        executed = self.execute_scheduled_actions()
+        max_gap = self.ACTION_SPACING_SECONDS[1]
+        while not self._stop.is_set():
+            delay = self.next_due_delay()
+            if delay is None or delay > max_gap:
+                break
+            self._wake.clear()
+            self._wake.wait(timeout=delay)
+            executed.extend(self.execute_scheduled_actions())
+        return executed
+    
+    def run_forever(self, max_idle: float = 30.0):
+        """Execute actions as they come due until stop() is called.
+        
+        Sleeps until the earliest queued action (at most `max_idle` seconds,
+        so limit resets and clock changes are picked up) instead of polling.
+        """
+        self._stop.clear()
+        while not self._stop.is_set():
+            # Clear before running so an enqueue during execution isn't missed
+            self._wake.clear()
+            executed = self.execute_scheduled_actions()
+            if executed:
+                logger.info(f"Executed {len(executed)} scheduled actions")
+            delay = self.next_due_delay()
+            self._wake.wait(timeout=max_idle if delay is None else min(delay, max_idle))
+    
+    def stop(self):
+        """Stop a running run_forever loop."""
+        self._stop.set()
+        self._wake.set()
+    
     def _execute_action(self, action: OutreachAction) -> Optional[Dict]:
         """Execute a single outreach action."""
+        # One clock read per action; the send result reuses it as its timestamp
         action.executed_at = datetime.now()
         
         try:
-            if action.action_type == "connection_request":
+            if action.action_type == ACTION_CONNECTION_REQUEST:
                 result = self._send_connection_request(action)
-            elif action.action_type == "dm":
+            elif action.action_type == ACTION_DM:
                 result = self._send_dm(action)
-            elif action.action_type == "followup":
+            elif action.action_type == ACTION_FOLLOWUP:
                 result = self._send_followup(action)
-            elif action.action_type == "email":
+            elif action.action_type == ACTION_EMAIL:
                 result = self._send_email(action)
             else:
                 result = None
             
-            action.status = "completed" if result else "failed"
+            action.status = ActionStatus.COMPLETED if result else ActionStatus.FAILED
             
             # Update CRM
             if self.crm_agent and result:
@@ -190,7 +324,7 @@ class OutreachExecutionAgent:
             
         except Exception as e:
             logger.error(f"Error executing action {action.action_type}: {e}")
-            action.status = "failed"
+            action.status = ActionStatus.FAILED
             return None
     
     def _send_connection_request(self, action: OutreachAction) -> Dict:
@@ -201,8 +335,8 @@ class OutreachExecutionAgent:
         return {
             "prospect_id": action.prospect_id,
             "action": "connection_request_sent",
-            "channel": "LinkedIn",
-            "timestamp": datetime.now().isoformat(),
+            "channel": CHANNEL_LINKEDIN,
+            "timestamp": action.executed_at.isoformat(),
             "message_preview": action.content[:50] + "..."
         }
     
@@ -212,8 +346,8 @@ class OutreachExecutionAgent:
         return {
             "prospect_id": action.prospect_id,
             "action": "dm_sent",
-            "channel": "LinkedIn",
-            "timestamp": datetime.now().isoformat()
+            "channel": CHANNEL_LINKEDIN,
+            "timestamp": action.executed_at.isoformat()
         }
     
     def _send_followup(self, action: OutreachAction) -> Dict:
@@ -222,8 +356,8 @@ class OutreachExecutionAgent:
         return {
             "prospect_id": action.prospect_id,
             "action": "followup_sent",
-            "channel": "LinkedIn",
-            "timestamp": datetime.now().isoformat()
+            "channel": CHANNEL_LINKEDIN,
+            "timestamp": action.executed_at.isoformat()
         }
     
     def _send_email(self, action: OutreachAction) -> Dict:
@@ -233,34 +367,33 @@ class OutreachExecutionAgent:
         return {
             "prospect_id": action.prospect_id,
             "action": "email_sent",
-            "channel": "Email",
-            "timestamp": datetime.now().isoformat()
+            "channel": CHANNEL_EMAIL,
+            "timestamp": action.executed_at.isoformat()
         }
     
     def process_incoming_replies(self, replies: List[Dict]) -> List[Dict]:
         """Process incoming message replies."""
         processed = []
+        # One timestamp for the whole batch of replies
+        received_at = datetime.now().isoformat()
         
         for reply in replies:
             try:
                 prospect_id = reply.get("prospect_id")
                 message = reply.get("message", "").lower()
                 
-                # Analyze sentiment
-                positive_indicators = ["interested", "yes", "sure", "book", "schedule", "call", "chat", "tell me more"]
-                negative_indicators = ["no", "not interested", "unsubscribe", "stop", "remove"]
-                
+                # Analyze sentiment (one scan per indicator group)
                 sentiment = "neutral"
-                if any(ind in message for ind in positive_indicators):
+                if _POSITIVE_REPLY_RE.search(message):
                     sentiment = "positive"
-                elif any(ind in message for ind in negative_indicators):
+                elif _NEGATIVE_REPLY_RE.search(message):
                     sentiment = "negative"
                 
                 result = {
                     "prospect_id": prospect_id,
                     "action": "reply_received",
                     "sentiment": sentiment,
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": received_at,
                     "requires_response": sentiment == "positive"
                 }
                 
@@ -277,44 +410,67 @@ class OutreachExecutionAgent:
         
         return processed
     
-    def setup_followup_sequence(self, prospect: Dict) -> List[OutreachAction]:
+    # (day offset, content) for touches 2-4; the last goes by email when possible
+    FOLLOWUP_TOUCHES = (
+        (3, "Day 3 follow-up"),
+        (7, "Day 7 value-add follow-up"),
+        (14, "Day 14 final follow-up"),
+    )
+    
+    def _followup_actions(self, prospect: Dict, base_time: datetime, hours: List[int]) -> List[OutreachAction]:
+        """Build touches 2-4 for one prospect from pre-drawn send hours."""
+        prospect_id = prospect.get("prospect_id")
+        last_channel = CHANNEL_EMAIL if prospect.get("email") else CHANNEL_LINKEDIN
+        last = len(self.FOLLOWUP_TOUCHES) - 1
+        return [
+            OutreachAction(
+                prospect_id=prospect_id,
+                action_type=ACTION_FOLLOWUP,
+                channel=last_channel if i == last else CHANNEL_LINKEDIN,
+                content=content,
+                scheduled_time=base_time + timedelta(days=days, hours=hour)
+            )
+            for i, ((days, content), hour) in enumerate(zip(self.FOLLOWUP_TOUCHES, hours))
+        ]
+    
+    def setup_followup_sequence(self, prospect: Dict, now: Optional[datetime] = None) -> List[OutreachAction]:
         """Setup 4-touch follow-up sequence."""
-        actions = []
-        base_time = datetime.now()
-        
         # Touch 1: Initial DM (already scheduled separately)
-        # Touch 2: Day 3 follow-up
-        actions.append(OutreachAction(
-            prospect_id=prospect.get("prospect_id"),
-            action_type="followup",
-            channel="LinkedIn",
-            content="Day 3 follow-up",
-            scheduled_time=base_time + timedelta(days=3, hours=random.randint(9, 17))
-        ))
-        
-        # Touch 3: Day 7 value-add
-        actions.append(OutreachAction(
-            prospect_id=prospect.get("prospect_id"),
-            action_type="followup",
-            channel="LinkedIn",
-            content="Day 7 value-add follow-up",
-            scheduled_time=base_time + timedelta(days=7, hours=random.randint(9, 17))
-        ))
-        
-        # Touch 4: Day 14 final attempt (email if available)
-        channel = "Email" if prospect.get("email") else "LinkedIn"
-        actions.append(OutreachAction(
-            prospect_id=prospect.get("prospect_id"),
-            action_type="followup",
-            channel=channel,
-            content="Day 14 final follow-up",
-            scheduled_time=base_time + timedelta(days=14, hours=random.randint(9, 17))
-        ))
+        # Touches 2-4: Day 3 follow-up, Day 7 value-add, Day 14 final attempt
+        hours = [random.randint(9, 17) for _ in self.FOLLOWUP_TOUCHES]
+        actions = self._followup_actions(prospect, now or datetime.now(), hours)
         
-        self.action_queue.extend(actions)
+        for action in actions:
+            self._queue_action(action)
         logger.info(f"Setup 3 follow-ups for {prospect.get('name')}")
         return actions
     
+    def setup_followup_sequences_batch(self, prospects: List[Dict],
+                                       now: Optional[datetime] = None) -> List[List[OutreachAction]]:
+        """Setup follow-up sequences for many prospects at once.
+        
+        All send hours are drawn in one call and every sequence shares one
+        base time; the queue is re-heapified once instead of per push.
+        """
+        per_prospect = len(self.FOLLOWUP_TOUCHES)
+        hours = random.choices(range(9, 18), k=per_prospect * len(prospects))
+        base_time = now or datetime.now()
+        
+        sequences = [
+            self._followup_actions(prospect, base_time, hours[i * per_prospect:(i + 1) * per_prospect])
+            for i, prospect in enumerate(prospects)
+        ]
+        entries = [
+            (action.scheduled_time, next(self._queue_seq), action)
+            for actions in sequences for action in actions
+        ]
+        with self._queue_lock:
+            self.action_queue.extend(entries)
+            heapq.heapify(self.action_queue)
+        self._wake.set()
+        logger.info(f"Setup follow-ups for {len(prospects)} prospects")
+        return sequences
+    
     def get_daily_stats(self) -> Dict:
         """Get daily outreach statistics."""
         self._check_and_reset_limits()
@@ -8,10 +8,53 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import re
 
+import httpx
+
+from utils.kimi_http import HTTP2_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8)
+
+_OBJECTION_PATTERNS = (
+    r"too expensive", r"not in budget", r"can't afford",
+    r"not right now", r"not interested", r"no need",
+    r"we have", r"already use", r"in-house"
+)
+_BUYING_PATTERNS = (
+    r"interested", r"tell me more", r"pricing", r"cost",
+    r"how much", r"book a call", r"schedule", r"sounds good"
+)
+
+
+# One alternation per group: a message scan stops at the first hit
+_OBJECTION_RE = re.compile("|".join(_OBJECTION_PATTERNS))
+_BUYING_RE = re.compile("|".join(_BUYING_PATTERNS))
+
+# Insight lists are reported truncated to this many entries
+_INSIGHT_SAMPLE_SIZE = 10
+
+# Template stats: bit 0 = replied, bit 1 = qualified (every qualified stage
+# also counts as replied). Stages missing here contribute nothing.
+_REPLIED_BIT = 1
+_QUALIFIED_BIT = 2
+_TEMPLATE_STAGE_BITS = {
+    "replied": _REPLIED_BIT,
+    "qualified": _REPLIED_BIT | _QUALIFIED_BIT,
+    "discovery_call_booked": _REPLIED_BIT | _QUALIFIED_BIT,
+    "proposal_sent": _REPLIED_BIT | _QUALIFIED_BIT,
+    "negotiation": _REPLIED_BIT | _QUALIFIED_BIT,
+    "closed_won": _REPLIED_BIT | _QUALIFIED_BIT,
+}
+
+# Niche funnel groups: only leads still in the reply/qualify stages count
+_NOT_ACCEPTED_STAGES = frozenset({"prospect", "outreach"})
+_NICHE_REPLIED_STAGES = frozenset({"replied", "qualified", "discovery_call_booked"})
+_NICHE_QUALIFIED_STAGES = frozenset({"qualified", "discovery_call_booked"})
+
 
 @dataclass
 class TemplatePerformance:
@@ -45,6 +88,13 @@ class PerformanceOptimizationAgent:
         self.crm_agent = crm_agent
         self.moonshot_api_key = config.get("moonshot_api_key")
         self.moonshot_base_url = config.get("moonshot_base_url", "https://api.moonshot.cn/v1")
+        # One pooled client so repeat analyses skip the TCP/TLS handshake
+        self.session = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            headers=self._kimi_headers(),
+            timeout=60.0,
+            limits=_HTTP_LIMITS
+        )
         
         # Performance thresholds
         self.acceptance_rate_target = 0.45
@@ -52,28 +102,26 @@ class PerformanceOptimizationAgent:
         self.qualified_rate_target = 0.10
         self.close_rate_target = 0.30
     
-    def _call_kimi(self, prompt: str) -> str:
-        """Call Kimi K2.5 for analysis."""
-        import requests
-        
-        headers = {
+    def _kimi_headers(self) -> Dict:
+        return {
             "Authorization": f"Bearer {self.moonshot_api_key}",
             "Content-Type": "application/json"
         }
-        
-        payload = {
+    
+    def _kimi_payload(self, prompt: str) -> Dict:
+        return {
             "model": self.config.get("moonshot_model", "kimi-k2.5"),
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.7,
             "max_tokens": 4000
         }
-        
+    
+    def _call_kimi(self, prompt: str) -> str:
+        """Call Kimi K2.5 for analysis."""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.moonshot_base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
+                json=self._kimi_payload(prompt)
             )
             response.raise_for_status()
             return response.json()["choices"][0]["message"]["content"]
@@ -86,31 +134,23 @@ class PerformanceOptimizationAgent:
         if not self.crm_agent:
             return []
         
-        # Aggregate data by template
-        template_stats = defaultdict(lambda: {
-            "usage": 0,
-            "replies": 0,
-            "qualified": 0
-        })
+        # Aggregate data by template: [usage, replies, qualified]
+        template_stats = defaultdict(lambda: [0, 0, 0])
         
         for prospect in self.crm_agent.prospects.values():
-            template = prospect.get("recommended_template", "unknown")
-            template_stats[template]["usage"] += 1
-            
-            if prospect.get("stage") in ["replied", "qualified", "discovery_call_booked", "proposal_sent", "negotiation", "closed_won"]:
-                template_stats[template]["replies"] += 1
-            
-            if prospect.get("stage") in ["qualified", "discovery_call_booked", "proposal_sent", "negotiation", "closed_won"]:
-                template_stats[template]["qualified"] += 1
+            bits = _TEMPLATE_STAGE_BITS.get(prospect.get("stage"), 0)
+            stats = template_stats[prospect.get("recommended_template", "unknown")]
+            stats[0] += 1
+            stats[1] += bits & _REPLIED_BIT
+            stats[2] += (bits & _QUALIFIED_BIT) >> 1
         
         performances = []
-        for template, stats in template_stats.items():
-            usage = stats["usage"]
+        for template, (usage, replies, qualified) in template_stats.items():
             if usage == 0:
                 continue
             
-            reply_rate = stats["replies"] / usage
-            qualified_rate = stats["qualified"] / usage
+            reply_rate = replies / usage
+            qualified_rate = qualified / usage
             
             # Generate recommendation
             if qualified_rate >= self.qualified_rate_target:
@@ -125,8 +165,8 @@ class PerformanceOptimizationAgent:
             performances.append(TemplatePerformance(
                 template_key=template,
                 usage_count=usage,
-                reply_count=stats["replies"],
-                qualified_count=stats["qualified"],
+                reply_count=replies,
+                qualified_count=qualified,
                 reply_rate=round(reply_rate, 3),
                 qualified_rate=round(qualified_rate, 3),
                 recommendation=recommendation
@@ -145,15 +185,27 @@ class PerformanceOptimizationAgent:
         niches = ["saas", "agency"]
         results = {}
         
+        # One pass over the CRM fills both niches' funnel counters
+        counts = {niche: [0, 0, 0, 0, 0, 0] for niche in niches}
+        for p in self.crm_agent.prospects.values():
+            c = counts.get(p.get("niche"))
+            if c is None:
+                continue
+            stage = p.get("stage")
+            c[0] += 1
+            if stage != "prospect":
+                c[1] += 1
+            if stage not in _NOT_ACCEPTED_STAGES:
+                c[2] += 1
+            if stage in _NICHE_REPLIED_STAGES:
+                c[3] += 1
+                if stage in _NICHE_QUALIFIED_STAGES:
+                    c[4] += 1
+            elif stage == "closed_won":
+                c[5] += 1
+        
         for niche in niches:
-            prospects = [p for p in self.crm_agent.prospects.values() if p.get("niche") == niche]
-            
-            researched = len(prospects)
-            connections_sent = len([p for p in prospects if p.get("stage") != "prospect"])
-            connections_accepted = len([p for p in prospects if p.get("stage") not in ["prospect", "outreach"]])
-            replies = len([p for p in prospects if p.get("stage") in ["replied", "qualified", "discovery_call_booked"]])
-            qualified = len([p for p in prospects if p.get("stage") in ["qualified", "discovery_call_booked"]])
-            closed = len([p for p in prospects if p.get("stage") == "closed_won"])
+            researched, connections_sent, connections_accepted, replies, qualified, closed = counts[niche]
             
             # Estimate average deal value from offer ladders
             avg_deal = 8000 if niche == "saas" else 10000
@@ -179,9 +231,11 @@ class PerformanceOptimizationAgent:
         if not self.crm_agent:
             return {}
         
+        # Only the reported samples are kept; counts cover every reply
         objections = []
         buying_signals = []
-        pricing_mentions = []
+        pricing_mentions = 0
+        categories = defaultdict(int)
         
         # Analyze prospects with conversation history
         for prospect in self.crm_agent.prospects.values():
@@ -190,14 +244,10 @@ class PerformanceOptimizationAgent:
                 if entry.get("action") == "reply_received":
                     message = entry.get("details", {}).get("message", "").lower()
                     
-                    # Extract objections
-                    objection_patterns = [
-                        r"too expensive", r"not in budget", r"can't afford",
-                        r"not right now", r"not interested", r"no need",
-                        r"we have", r"already use", r"in-house"
-                    ]
-                    for pattern in objection_patterns:
-                        if re.search(pattern, message):
+                    # Extract objections: one per reply, categorized as found
+                    if _OBJECTION_RE.search(message):
+                        categories[self._objection_category(message[:100])] += 1
+                        if len(objections) < _INSIGHT_SAMPLE_SIZE:
                             objections.append({
                                 "prospect_id": prospect["prospect_id"],
                                 "objection": message[:100],
@@ -205,60 +255,53 @@ class PerformanceOptimizationAgent:
                             })
                     
                     # Extract buying signals
-                    buying_patterns = [
-                        r"interested", r"tell me more", r"pricing", r"cost",
-                        r"how much", r"book a call", r"schedule", r"sounds good"
-                    ]
-                    for pattern in buying_patterns:
-                        if re.search(pattern, message):
-                            buying_signals.append({
-                                "prospect_id": prospect["prospect_id"],
-                                "signal": message[:100],
-                                "date": entry.get("date")
-                            })
-                    
-                    # Extract pricing mentions
-                    if "price" in message or "cost" in message or "$" in message:
-                        pricing_mentions.append({
+                    if len(buying_signals) < _INSIGHT_SAMPLE_SIZE and _BUYING_RE.search(message):
+                        buying_signals.append({
                             "prospect_id": prospect["prospect_id"],
-                            "context": message[:150],
+                            "signal": message[:100],
                             "date": entry.get("date")
                         })
+                    
+                    # Count pricing mentions
+                    if "price" in message or "cost" in message or "$" in message:
+                        pricing_mentions += 1
         
         return {
-            "common_objections": objections[:10],
-            "buying_signals": buying_signals[:10],
-            "pricing_sensitivity": len(pricing_mentions),
-            "objection_categories": self._categorize_objections(objections)
+            "common_objections": objections,
+            "buying_signals": buying_signals,
+            "pricing_sensitivity": pricing_mentions,
+            "objection_categories": dict(categories)
         }
     
-    def _categorize_objections(self, objections: List[Dict]) -> Dict[str, int]:
-        """Categorize objections by type."""
-        categories = defaultdict(int)
-        
-        for obj in objections:
-            text = obj["objection"].lower()
-            if "price" in text or "expensive" in text or "budget" in text:
-                categories["price"] += 1
-            elif "now" in text or "timing" in text:
-                categories["timing"] += 1
-            elif "have" in text or "use" in text or "already" in text:
-                categories["competition"] += 1
-            elif "need" in text or "interested" in text:
-                categories["no_fit"] += 1
-            else:
-                categories["other"] += 1
-        
-        return dict(categories)
+    def _objection_category(self, text: str) -> str:
+        """Classify one objection excerpt by type."""
+        if "price" in text or "expensive" in text or "budget" in text:
+            return "price"
+        elif "now" in text or "timing" in text:
+            return "timing"
+        elif "have" in text or "use" in text or "already" in text:
+            return "competition"
+        elif "need" in text or "interested" in text:
+            return "no_fit"
+        return "other"
     
-    def generate_recommendations(self) -> List[Dict]:
-        """Generate optimization recommendations."""
+    def generate_recommendations(self, template_perf: Optional[List[TemplatePerformance]] = None,
+                                 niche_perf: Optional[Tuple] = None,
+                                 insights: Optional[Dict] = None,
+                                 weekly_metrics: Optional[Dict] = None) -> List[Dict]:
+        """Generate optimization recommendations.
+        
+        Callers that already ran the analyses (generate_weekly_report) pass
+        them in; anything left as None is computed here.
+        """
         recommendations = []
         
         # Get performance data
-        template_perf = self.analyze_template_performance()
-        saas_perf, agency_perf = self.analyze_niche_performance()
-        insights = self.extract_conversation_insights()
+        if template_perf is None:
+            template_perf = self.analyze_template_performance()
+        saas_perf, agency_perf = niche_perf if niche_perf is not None else self.analyze_niche_performance()
+        if insights is None:
+            insights = self.extract_conversation_insights()
         
         # Template recommendations
         low_performers = [t for t in template_perf if t.qualified_rate < 0.05 and t.usage_count > 10]
@@ -304,7 +347,8 @@ class PerformanceOptimizationAgent:
             })
         
         # LinkedIn health check
-        weekly_metrics = self.crm_agent.get_weekly_metrics() if self.crm_agent else {}
+        if weekly_metrics is None:
+            weekly_metrics = self.crm_agent.get_weekly_metrics() if self.crm_agent else {}
         if weekly_metrics.get("acceptance_rate", 0) < 0.35:
             recommendations.append({
                 "type": "linkedin_health",
@@ -327,13 +371,21 @@ class PerformanceOptimizationAgent:
     
     def generate_weekly_report(self) -> Dict:
         """Generate comprehensive weekly performance report."""
-        template_perf = self.analyze_template_performance()
-        saas_perf, agency_perf = self.analyze_niche_performance()
-        insights = self.extract_conversation_insights()
-        recommendations = self.generate_recommendations()
+        # Independent read-only passes over the CRM; run each once, concurrently,
+        # and hand the results to generate_recommendations instead of redoing them
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            f_template = executor.submit(self.analyze_template_performance)
+            f_niche = executor.submit(self.analyze_niche_performance)
+            f_insights = executor.submit(self.extract_conversation_insights)
+            f_metrics = executor.submit(self.crm_agent.get_weekly_metrics) if self.crm_agent else None
+            pipeline = self.crm_agent.get_pipeline_summary() if self.crm_agent else {}
+            template_perf = f_template.result()
+            niche_perf = f_niche.result()
+            insights = f_insights.result()
+            weekly_metrics = f_metrics.result() if f_metrics else {}
         
-        weekly_metrics = self.crm_agent.get_weekly_metrics() if self.crm_agent else {}
-        pipeline = self.crm_agent.get_pipeline_summary() if self.crm_agent else {}
+        saas_perf, agency_perf = niche_perf
+        recommendations = self.generate_recommendations(template_perf, niche_perf, insights, weekly_metrics)
         
         report = {
             "report_date": datetime.now().isoformat(),
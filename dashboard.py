@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import parse_qs, urlparse
 
+from agents.crm_pipeline_agent import read_prospects, read_tasks
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -77,37 +79,30 @@ class DashboardHandler(BaseHTTPRequestHandler):
         }
         
         # Load prospects
-        prospects_file = Path('data/prospects.json')
-        if prospects_file.exists():
-            with open(prospects_file) as f:
-                prospects = json.load(f)
-                stats['prospects'] = len(prospects)
-                
-                # Calculate pipeline value
-                deal_values = {
-                    'discovery_call_booked': 8000,
-                    'proposal_sent': 10000,
-                    'negotiation': 10000,
-                    'closed_won': 10000
-                }
-                
-                for p in prospects.values():
-                    stage = p.get('stage', '')
-                    if stage in deal_values:
-                        stats['pipeline_value'] += deal_values[stage]
-                    if stage == 'closed_won':
-                        stats['deals_won'] += 1
+        prospects = read_prospects()
+        stats['prospects'] = len(prospects)
+        
+        # Calculate pipeline value
+        deal_values = {
+            'discovery_call_booked': 8000,
+            'proposal_sent': 10000,
+            'negotiation': 10000,
+            'closed_won': 10000
+        }
+        
+        for p in prospects.values():
+            stage = p.get('stage', '')
+            if stage in deal_values:
+                stats['pipeline_value'] += deal_values[stage]
+            if stage == 'closed_won':
+                stats['deals_won'] += 1
         
         # Load tasks
-        tasks_file = Path('data/tasks.json')
-        if tasks_file.exists():
-            with open(tasks_file) as f:
-                tasks = json.load(f)
-                today = datetime.now().strftime('%Y-%m-%d')
-                stats['today_tasks'] = sum(
-                    1 for t in tasks 
-                    if t.get('due_date', '').startswith(today) and t.get('status') == 'pending'
-                )
+        today = datetime.now().strftime('%Y-%m-%d')
+        stats['today_tasks'] = sum(
+            1 for t in read_tasks()
+            if (t.get('due_date') or '').startswith(today) and t.get('status') == 'pending'
+        )
         
         return stats
     
@@ -115,13 +110,9 @@ class DashboardHandler(BaseHTTPRequestHandler):
         """Get pipeline stage breakdown."""
         stages = {}
         
-        prospects_file = Path('data/prospects.json')
-        if prospects_file.exists():
-            with open(prospects_file) as f:
-                prospects = json.load(f)
-                for p in prospects.values():
-                    stage = p.get('stage', 'unknown')
-                    stages[stage] = stages.get(stage, 0) + 1
+        for p in read_prospects().values():
+            stage = p.get('stage', 'unknown')
+            stages[stage] = stages.get(stage, 0) + 1
         
         return {
             "stages": stages,
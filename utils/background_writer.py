@@ -0,0 +1,32 @@
+"""
+Background File Writer
+Writes already-serialized payloads on a single worker thread so callers return
+without waiting on disk; interpreter exit waits for pending writes.
+"""
+import atexit
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+_writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-writer")
+atexit.register(_writer_pool.shutdown, wait=True)
+
+
+def _write_blocking(filepath: Union[str, Path], payload: bytes, done_message: str):
+    try:
+        with open(filepath, 'wb') as f:
+            f.write(payload)
+        logger.info(done_message)
+    except OSError as e:
+        logger.error(f"Error writing {filepath}: {e}")
+
+
+def write_in_background(filepath: Union[str, Path], payload: bytes, done_message: str = "") -> Future:
+    """Queue `payload` to be written to `filepath`; logs `done_message` once written.
+
+    Serialize on the caller's thread so the bytes are a snapshot of the data.
+    """
+    return _writer_pool.submit(_write_blocking, filepath, payload, done_message or f"Saved {filepath}")
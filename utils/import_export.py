@@ -2,12 +2,17 @@
 Prospect Import/Export Utilities
 Handle CSV, JSON, and manual LinkedIn list imports
 """
-import json
 import csv
+import sys
 import argparse
 from pathlib import Path
 from datetime import datetime
 
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.crm_pipeline_agent import CRMPipelineAgent, read_prospects
+
 
 def import_from_csv(filepath: str, niche: str = "saas"):
     """Import prospects from CSV file."""
@@ -30,7 +35,7 @@ def import_from_csv(filepath: str, niche: str = "saas"):
             }
             prospects.append(prospect)
     
-    # Save to prospects.json
+    # Add to the CRM
     save_prospects(prospects)
     print(f"✅ Imported {len(prospects)} prospects from {filepath}")
 
@@ -72,15 +77,12 @@ def import_from_linkedin_urls(urls_file: str, niche: str = "saas"):
 
 def export_to_csv(filepath: str, stage_filter: str = None):
     """Export prospects to CSV."""
-    prospects_file = Path('data/prospects.json')
+    all_prospects = read_prospects()
     
-    if not prospects_file.exists():
+    if not all_prospects:
         print("❌ No prospects found")
         return
     
-    with open(prospects_file) as f:
-        all_prospects = json.load(f)
-    
     # Filter if needed
     if stage_filter:
         prospects = [
@@ -110,23 +112,10 @@ def export_qualified_leads(filepath: str = "qualified_leads.csv"):
 
 
 def save_prospects(prospects: list):
-    """Save prospects to the main prospects.json file."""
-    prospects_file = Path('data/prospects.json')
-    
-    # Load existing
-    if prospects_file.exists():
-        with open(prospects_file) as f:
-            existing = json.load(f)
-    else:
-        existing = {}
-    
-    # Add new prospects
-    for p in prospects:
-        existing[p['prospect_id']] = p
-    
-    # Save
-    with open(prospects_file, 'w') as f:
-        json.dump(existing, f, indent=2)
+    """Add prospects to the CRM store, replacing any with the same prospect_id."""
+    crm = CRMPipelineAgent({})
+    crm.add_prospects_batch(prospects)
+    crm.flush(wait=True)
 
 
 def main():
@@ -0,0 +1,58 @@
+"""
+Kimi HTTP helpers
+Shared by the agents that call the Kimi chat-completions API: HTTP/2 detection
+and an on-disk response cache.
+"""
+import hashlib
+import importlib.util
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1 keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ResponseCache:
+    """SQLite-backed prompt-hash -> response store with per-entry expiry."""
+
+    def __init__(self, path: Path, ttl: float):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def key_for(payload: Dict) -> str:
+        """Cache key for a chat-completions payload: model, temperature and messages."""
+        contents = "\x1f".join(m["content"] for m in payload["messages"])
+        raw = f"{payload['model']}|{payload['temperature']}|{contents}".encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM responses WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            if row:
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        return None
+
+    def set(self, key: str, content: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, expires_at) VALUES (?, ?, ?)",
+                (key, content, time.time() + self.ttl)
+            )